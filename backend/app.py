@@ -1,19 +1,50 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from extensions import db, create_sqlite_directory
+from utils.document_search import setup_search_index
+from utils import compression, metrics
+from utils.json_encoding import FastJSONProvider
+from utils.upload_request import MemoryUploadRequest
 from routes.documents import documents_bp
+from utils.ocr_processing import start_language_detection_warm_up
 import os
-from config import SECRET_KEY, DEBUG, PORT
+from config import SECRET_KEY, DEBUG, PORT, DATABASE_URL, SERVER_TIMING
+from config import RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_BYTES
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+app.request_class = MemoryUploadRequest
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
 # App configuration
 app.config['SECRET_KEY'] = SECRET_KEY
+app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+
+# Set up the database; create the SQLite directory, any missing tables and the search index
+create_sqlite_directory(app, DATABASE_URL)
+db.init_app(app)
+with app.app_context():
+    db.create_all()
+    setup_search_index(db.engine)
 
 # Register blueprints
 app.register_blueprint(documents_bp, url_prefix='/api/documents')
 
+# Request timings, Server-Timing headers and GET /metrics
+metrics.init_app(app, server_timing=SERVER_TIMING)
+
+# gzip/brotli for JSON responses; registered last so that it runs first
+# and Server-Timing includes it
+if RESPONSE_COMPRESSION:
+    compression.init_app(app, min_bytes=RESPONSE_COMPRESSION_MIN_BYTES)
+
+# Load the language profiles in the background, so neither worker start-up
+# nor the first upload has to wait for them. gunicorn.conf.py and asgi.py
+# start this in each worker; the first request does it for other servers.
+# Never at import, which gunicorn --preload runs before forking.
+app.before_request(start_language_detection_warm_up)
+
 # Create temp directory if it doesn't exist
 basedir = os.path.abspath(os.path.dirname(__file__))
 os.makedirs(os.path.join(basedir, 'temp'), exist_ok=True)
@@ -43,4 +74,6 @@ def lifestyle():
         }), 500
 
 if __name__ == '__main__':
+    # gunicorn does this in gunicorn.conf.py
+    metrics.clear_metrics_dir()
     app.run(debug=DEBUG, port=PORT)
\ No newline at end of file
@@ -0,0 +1,85 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from hypercorn.middleware import AsyncioWSGIMiddleware
+from quart import Quart
+
+from app import app as flask_app
+from config import ASGI_THREADS, PORT, RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_BYTES, SERVER_TIMING
+from routes import documents_async
+from utils import compression, metrics
+from utils.json_encoding import FastJSONProvider
+from utils.ocr_processing import start_language_detection_warm_up
+from utils.upload_request import async_request_class
+
+# Serves the same API from an asyncio event loop, e.g. `hypercorn asgi:app`
+# instead of `gunicorn app:app`. The upload endpoints are async views
+# (routes/documents_async.py) so a worker can keep many uploads in flight;
+# every other route is handled by the Flask app on the loop's thread pool.
+# The Flask app still registers its own upload routes, which answer the CORS
+# preflight requests for these paths, but their POST handlers are never
+# reached here: changes to the upload endpoints belong in the helpers both
+# modules share in routes/documents.py.
+
+UPLOAD_PATHS = {'/api/documents/upload', '/api/documents/upload-base64', '/api/documents/upload-batch'}
+
+upload_app = Quart(__name__)
+upload_app.json = FastJSONProvider(upload_app)
+upload_app.request_class = async_request_class()
+upload_app.config.update(
+    SECRET_KEY=flask_app.config['SECRET_KEY'],
+    # Flask sets none of these limits, and processing an upload can take minutes
+    MAX_CONTENT_LENGTH=None,
+    BODY_TIMEOUT=None,
+    RESPONSE_TIMEOUT=None
+)
+documents_async.flask_app = flask_app
+upload_app.register_blueprint(documents_async.documents_async_bp, url_prefix='/api/documents')
+
+# Request timings and Server-Timing headers; GET /metrics is on the Flask app
+metrics.init_async_app(upload_app, server_timing=SERVER_TIMING)
+if RESPONSE_COMPRESSION:
+    compression.init_async_app(upload_app, min_bytes=RESPONSE_COMPRESSION_MIN_BYTES)
+
+
+@upload_app.after_request
+async def _allow_any_origin(response):
+    # Matches the Flask app's CORS setup for /api/*; preflight requests go to it
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@upload_app.before_serving
+async def _prepare_worker():
+    # hypercorn starts its workers as daemonic processes, and multiprocessing
+    # refuses to start the extraction and job pools from those
+    multiprocessing.current_process().daemon = False
+
+    # Pipeline stages, database work and the Flask routes all run on this pool
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='asgi')
+    )
+
+    start_language_detection_warm_up()
+
+
+_wsgi_app = AsyncioWSGIMiddleware(flask_app)
+
+
+async def app(scope, receive, send):
+    """Send uploads to the async views and every other request to the Flask app"""
+    if scope["type"] == "http" and (scope["path"] not in UPLOAD_PATHS or scope["method"] == "OPTIONS"):
+        return await _wsgi_app(scope, receive, send)
+    return await upload_app(scope, receive, send)
+
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    # hypercorn has no start-up hook for this, unlike gunicorn.conf.py
+    metrics.clear_metrics_dir()
+    config = Config()
+    config.bind = [f"127.0.0.1:{PORT}"]
+    asyncio.run(serve(app, config))
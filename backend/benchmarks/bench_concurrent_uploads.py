@@ -0,0 +1,85 @@
+"""Send concurrent uploads to a running server and report latency and throughput.
+
+Compares serving modes, e.g. `gunicorn app:app` with
+`hypercorn asgi:app`, each started with one worker. Every upload is a
+distinct image, so the result cache does not answer any of them.
+
+Usage (from the backend directory, with the server running):
+    python benchmarks/bench_concurrent_uploads.py --url http://127.0.0.1:8000 --uploads 32 --concurrency 16
+"""
+import argparse
+import io
+import statistics
+import sys
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageDraw
+
+
+def distinct_image(index, run_id):
+    """A small PNG with text that differs per upload and per run"""
+    image = Image.new('L', (1200, 1600), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(20):
+        draw.text((60, 60 + line * 70), f"Laboratory result {run_id} {index}-{line}: glucose 95 mg/dL", fill=0)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def multipart(fields, filename, file_data):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f'Content-Type: image/png\r\n\r\n'.encode() + file_data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def upload(url, patient_id, index, file_data):
+    body, content_type = multipart({"patient_id": patient_id, "file_type": "benchmark"}, f"page-{index}.png", file_data)
+    request = urllib.request.Request(f"{url}/api/documents/upload", body, {"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5050')
+    parser.add_argument('--uploads', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--patient-id', type=int, default=999999)
+    args = parser.parse_args()
+
+    run_id = uuid.uuid4().hex[:8]
+    images = [distinct_image(index, run_id) for index in range(args.uploads)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(lambda item: upload(args.url, args.patient_id, *item), enumerate(images)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for _, seconds in results)
+    failed = [status for status, _ in results if status != 201]
+    print(f"{args.uploads} uploads, {args.concurrency} at a time, to {args.url}")
+    print(f"total {elapsed:.2f} s, {args.uploads / elapsed:.2f} uploads/s")
+    print(f"latency median {statistics.median(latencies):.2f} s, "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))]:.2f} s, max {latencies[-1]:.2f} s")
+    if failed:
+        print(f"{len(failed)} failed: statuses {sorted(set(failed))}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
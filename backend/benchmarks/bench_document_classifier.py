@@ -0,0 +1,92 @@
+"""Compare the legacy substring chain with the scored classifier, one by one and batched.
+
+The legacy chain stops at the first category with any matching substring, so
+it is cheap but reads only the start of most documents. The classifier reads
+every token once and scores every category.
+
+Usage (from the backend directory):
+    python benchmarks/bench_document_classifier.py --documents 2000 --size-kb 8
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.document_classifier import classify_document, classify_documents
+
+SENTENCES = [
+    "Laboratory results for the blood sample collected this morning.",
+    "Hemoglobin 13.2 g/dL, reference range 12.0 - 16.0 g/dL.",
+    "Take one tablet twice daily with food. Refills: 2.",
+    "Rx: Amoxicillin 500 mg, dispensed by the pharmacy.",
+    "Chief complaint: persistent cough. Assessment and plan discussed.",
+    "CT scan of the chest with contrast. Impression: no acute findings.",
+    "Your insurance policy covers this claim after the deductible.",
+    "Please contact the front desk to reschedule your appointment.",
+]
+
+
+def legacy_document_type(text):
+    """get_document_type before the scored classifier"""
+    text_lower = text.lower()
+    if any(term in text_lower for term in ['lab', 'test', 'result', 'blood', 'sample', 'reference range']):
+        return "Laboratory Report"
+    elif any(term in text_lower for term in ['prescription', 'rx', 'take', 'daily', 'dose', 'medication']):
+        return "Prescription or Medication Instructions"
+    elif any(term in text_lower for term in ['diagnosis', 'assessment', 'plan', 'history', 'examination']):
+        return "Clinical Note or Assessment"
+    elif any(term in text_lower for term in ['x-ray', 'mri', 'ct', 'scan', 'imaging', 'radiograph']):
+        return "Imaging Report"
+    elif any(term in text_lower for term in ['insurance', 'policy', 'coverage', 'claim']):
+        return "Insurance Document"
+    else:
+        return "Medical Document"
+
+
+def synthetic_documents(count, size_kb, seed=0):
+    rng = random.Random(seed)
+    documents = []
+    for _ in range(count):
+        # Each document leans towards one topic, with some noise from the others
+        topic = rng.choice(SENTENCES)
+        parts = []
+        size = 0
+        while size < size_kb * 1024:
+            sentence = topic if rng.random() < 0.6 else rng.choice(SENTENCES)
+            parts.append(sentence)
+            size += len(sentence) + 1
+        documents.append(" ".join(parts))
+    return documents
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--size-kb', type=int, default=8, help='size of each synthetic document')
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.documents, args.size_kb)
+    legacy_time, legacy = timed(lambda: [legacy_document_type(text) for text in documents])
+    single_time, single = timed(lambda: [classify_document(text) for text in documents])
+    batch_time, batch = timed(lambda: classify_documents(documents))
+
+    assert [c.label for c in single] == [c.label for c in batch]
+    changed = sum(old != new.label for old, new in zip(legacy, single))
+
+    print(f"documents: {len(documents):,} x {args.size_kb} KB")
+    print(f"legacy substring chain: {legacy_time * 1000:8.1f} ms")
+    print(f"scored, one by one:     {single_time * 1000:8.1f} ms")
+    print(f"scored, batched:        {batch_time * 1000:8.1f} ms")
+    print(f"labels that differ from the legacy chain: {changed:,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Compare LIKE scans with the FTS5 index for searching a patient's documents.
+
+Builds a synthetic corpus in a temporary SQLite database with the real
+document table and search index, timing the inserts (the index is kept up
+to date by triggers), then runs the same searches both ways.
+
+Per patient, LIKE only walks that patient's rows through the
+(patient_id, uploaded_on) index and stops at 20 unranked hits. FTS ranks
+every match with BM25 and builds a snippet, so it pays most for terms that
+are in half the corpus. Across the corpus, LIKE reads every row.
+
+Usage (from the backend directory):
+    python benchmarks/bench_document_search.py --documents 100000 --patients 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sqlalchemy import create_engine, text
+
+from extensions import db
+import models
+from utils.document_search import setup_search_index, search_documents
+
+# (term, share of documents containing it)
+TERMS = [('hemoglobin', 0.5), ('glucose', 0.3), ('cholesterol', 0.1), ('hba1c', 0.03), ('ferritin', 0.005)]
+FILLER = ("patient sample collected morning fasting result reference range value units "
+          "normal high low report laboratory department physician signature page").split()
+
+
+def synthetic_document(rng):
+    words = [rng.choice(FILLER) for _ in range(80)]
+    for term, share in TERMS:
+        if rng.random() < share:
+            words.insert(rng.randrange(len(words)), f"{term.upper() if term == 'hba1c' else term} {rng.randint(1, 300)}")
+    extracted_text = ' '.join(words)
+    summary = "Lab report: " + ', '.join(term for term, _ in TERMS if term in extracted_text.lower())
+    return extracted_text, {"summary": {"summaries": {"english": summary}}}
+
+
+def build_corpus(engine, documents, patients, batch=5000, seed=0):
+    rng = random.Random(seed)
+    insert = models.Document.__table__.insert()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for first in range(0, documents, batch):
+            rows = []
+            for _ in range(min(batch, documents - first)):
+                extracted_text, structured_data = synthetic_document(rng)
+                rows.append({
+                    "patient_id": rng.randrange(1, patients + 1),
+                    "type": "lab_result",
+                    "original_filename": "report.pdf",
+                    "content_hash": '%064x' % rng.getrandbits(256),
+                    "extracted_text": extracted_text,
+                    "structured_data": structured_data
+                })
+            conn.execute(insert, rows)
+    return time.perf_counter() - start
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--patients', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=50, help='patients searched per term')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine('sqlite:///' + os.path.join(tmp, 'bench.sqlite3'))
+        db.metadata.create_all(engine)
+        setup_search_index(engine)
+
+        insert_time = build_corpus(engine, args.documents, args.patients)
+        print(f"corpus: {args.documents:,} documents for {args.patients:,} patients")
+        print(f"insert with FTS triggers: {insert_time:.1f} s ({args.documents / insert_time:,.0f} documents/s)")
+
+        rng = random.Random(1)
+        patients = [rng.randrange(1, args.patients + 1) for _ in range(args.queries)]
+        like_sql = text(
+            "SELECT id FROM document WHERE patient_id = :patient_id"
+            " AND (extracted_text LIKE :pattern OR json_extract(structured_data, '$.summary.summaries.english') LIKE :pattern)"
+            " ORDER BY uploaded_on DESC LIMIT 20"
+        )
+        scan_sql = text("SELECT COUNT(*) FROM document WHERE extracted_text LIKE :pattern")
+
+        with engine.connect() as conn:
+            print(f"\n{'term':<12} {'share':>6} {'LIKE/patient':>13} {'FTS/patient':>12} {'LIKE/corpus':>12} {'FTS/corpus':>11}")
+            for term, share in TERMS:
+                pattern = f"%{term}%"
+                like_time, _ = timed(lambda: [
+                    conn.execute(like_sql, {"patient_id": p, "pattern": pattern}).fetchall() for p in patients
+                ], 1)
+                fts_time, _ = timed(lambda: [search_documents(conn, term, p) for p in patients], 1)
+                scan_time, _ = timed(lambda: conn.execute(scan_sql, {"pattern": pattern}).scalar(), 1)
+                fts_all_time, _ = timed(lambda: conn.execute(
+                    text("SELECT COUNT(*) FROM document_fts WHERE document_fts MATCH :match"),
+                    {"match": f'{{extracted_text summary}} : "{term}"'}).scalar(), 1)
+                print(f"{term:<12} {share:>6.1%} {like_time / len(patients) * 1000:>10.2f} ms "
+                      f"{fts_time / len(patients) * 1000:>9.2f} ms {scan_time * 1000:>9.1f} ms {fts_all_time * 1000:>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Compare the single-pass entity engine with the per-function regex scans.
+
+The legacy functions below are the extractors the summarizers used before
+utils/entity_extraction.py: every call compiled and ran its own pattern list
+over the full text.
+
+Usage (from the backend directory):
+    python benchmarks/bench_entity_extraction.py --size-kb 500 --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.entity_extraction import extract_entities
+
+LINES = [
+    "Patient: {name}",
+    "Dr. {name}",
+    "Collected on {d}/{m}/2024, reported {month} {d}, 2024",
+    "Glucose: {v} mg/dL (Reference: 70 - 99 mg/dL)",
+    "Hemoglobin: {v}.{d} g/dL",
+    "Metformin {v} mg twice daily. Atorvastatin {d}0 mg at night",
+    "Take {d} tablet after meals.",
+    "Refills: {d}",
+    "Policy Number: POL-{v}{d}",
+    "Member ID: {v}{m}{d}",
+    "Group #: G{v}",
+    "Effective Date: {m}/{d}/2024",
+    "Insurance: {name} Health",
+    "Page footer - SYNLAB Lazio s.r.l. - Laboratory accredited ISO 15189",
+]
+NAMES = ["John Doe", "Maria Rossi", "Alice Smith", "Karl Becker"]
+MONTHS = ["January", "March", "June", "October"]
+
+
+def synthetic_ocr_text(size_kb, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < size_kb * 1024:
+        line = rng.choice(LINES).format(
+            name=rng.choice(NAMES), month=rng.choice(MONTHS),
+            d=rng.randint(1, 28), m=rng.randint(1, 12), v=rng.randint(10, 999)
+        )
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+def legacy_extract_all(text):
+    """The regex scans a lab, prescription, insurance and general summary used to make"""
+    dates = []
+    for pattern in [r'\d{1,2}/\d{1,2}/\d{2,4}', r'\d{1,2}-\d{1,2}-\d{2,4}',
+                    r'[A-Za-z]{3,9}\s+\d{1,2},?\s+\d{4}', r'\d{1,2}\s+[A-Za-z]{3,9},?\s+\d{4}']:
+        dates.extend(re.findall(pattern, text))
+
+    quantities = re.findall(r'(\d+\.?\d*)\s*([a-zA-Z/%]+)', text)
+    labeled = re.findall(r'([A-Za-z\s]+):\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)', text)
+
+    medications = []
+    for pattern in [
+        r'([A-Za-z]+(?:cillin|mycin|oxacin|oxin|zepam|statin|sartan|pril|ide|olol|parin|ine|one|zole|mab))\s+(\d+\.?\d*\s*(?:mg|mcg|g|ml|%|mg/ml|mg/g|IU))',
+        r'([A-Za-z]+(?:-[A-Za-z]+)?)\s+(\d+\.?\d*\s*(?:mg|mcg|g|ml|%|mg/ml|mg/g|IU))'
+    ]:
+        medications.extend(re.findall(pattern, text))
+    instructions = re.findall(r'Take\s+(.+?)(?:\.|\n)', text)
+
+    lab_results = []
+    for pattern in [
+        r'([A-Za-z\s]+):\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)\s*(?:\(Reference:?\s*(\d+\.?\d*\s*-\s*\d+\.?\d*\s*[a-zA-Z/%]*)\))?',
+        r'([A-Za-z\s]+)\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)\s*(?:Reference Range:?\s*(\d+\.?\d*\s*-\s*\d+\.?\d*\s*[a-zA-Z/%]*))?'
+    ]:
+        lab_results.extend(re.findall(pattern, text))
+
+    fields = [
+        re.search(r'(?:Name|Patient):\s*([A-Za-z\s]+)', text),
+        re.search(r'(?:Dr\.|Doctor|Physician)[\s:]*((?:[A-Za-z]+\s*)+)', text),
+        re.search(r'Refills?:\s*(\d+|zero|none)', text, re.IGNORECASE),
+    ]
+    for patterns in [
+        [r'Policy\s*(?:#|Number|No\.?):\s*([A-Za-z0-9-]+)', r'Policy\s*ID:\s*([A-Za-z0-9-]+)'],
+        [r'Member\s*(?:ID|Number|#):\s*([A-Za-z0-9-]+)', r'ID\s*Number:\s*([A-Za-z0-9-]+)'],
+        [r'Group\s*(?:#|Number|No\.?):\s*([A-Za-z0-9-]+)'],
+        [r'Effective\s*Date:\s*([A-Za-z0-9/-]+)', r'Coverage\s*Begins:\s*([A-Za-z0-9/-]+)'],
+        [r'Expiration\s*Date:\s*([A-Za-z0-9/-]+)', r'Coverage\s*Ends:\s*([A-Za-z0-9/-]+)', r'Expires:\s*([A-Za-z0-9/-]+)'],
+        [r'(?:Insurance|Provider|Carrier|Plan):\s*([A-Za-z\s]+)', r'([A-Za-z]+\s+(?:Insurance|Health|Life))'],
+    ]:
+        for pattern in patterns:
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                fields.append(match)
+                break
+
+    return (len(dates) + len(quantities) + len(labeled) + len(medications) + len(instructions) + len(lab_results)
+            + len(fields))
+
+
+def best_of(fn, text, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-kb', type=int, default=500, help='size of the synthetic OCR text')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_ocr_text(args.size_kb)
+    # Python's re module caches compiled patterns; clear it so the legacy path
+    # pays its compile cost the way a fresh worker does
+    re.purge()
+    legacy_time, legacy_count = best_of(legacy_extract_all, text, args.repeat)
+    engine_time, entities = best_of(extract_entities, text, args.repeat)
+
+    print(f"text: {len(text):,} characters")
+    print(f"legacy per-function scans: {legacy_time * 1000:8.1f} ms ({legacy_count:,} matches)")
+    print(f"single-pass engine:        {engine_time * 1000:8.1f} ms ({len(entities):,} entities)")
+    print(f"speedup: {legacy_time / engine_time:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
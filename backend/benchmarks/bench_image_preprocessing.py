@@ -0,0 +1,111 @@
+"""Compare OCR of raw photos with OCR after the preprocessing stage.
+
+Runs Tesseract on the image as uploaded and after preprocess_for_ocr at
+several target DPIs, with and without binarisation. Preprocessing and OCR
+are timed separately. Accuracy is the similarity of each variant's text to
+--reference (a hand-checked transcription) or, without one, to the raw OCR.
+
+Usage (from the backend directory):
+    python benchmarks/bench_image_preprocessing.py --image test_data/Bild.jpg --simulate-photo
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pytesseract
+from PIL import Image
+from utils.image_preprocessing import effective_dpi, preprocess_for_ocr
+
+DEFAULT_IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'test_data', 'Bild.jpg')
+
+# Pixel count of a typical 12 megapixel phone camera
+PHOTO_PIXELS = 12_000_000
+
+
+def simulate_photo(image):
+    """Upscale a scan to phone camera size, with the placeholder 72 dpi phones write"""
+    scale = (PHOTO_PIXELS / (image.width * image.height)) ** 0.5
+    if scale <= 1:
+        return image
+    photo = image.resize((round(image.width * scale), round(image.height * scale)), Image.LANCZOS)
+    photo.info['dpi'] = (72, 72)
+    return photo
+
+
+def accuracy(text, reference):
+    """Character similarity and the share of reference words found in the text"""
+    ratio = difflib.SequenceMatcher(None, text, reference, autojunk=False).ratio()
+    words = set(text.split())
+    reference_words = reference.split()
+    recall = sum(word in words for word in reference_words) / len(reference_words) if reference_words else 1.0
+    return ratio, recall
+
+
+def run(image, repeat, target_dpi=None, to_binary=False):
+    """Return (preprocess seconds, OCR seconds, text), best of repeat runs"""
+    best_pre = best_ocr = None
+    text = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        prepared = image
+        config = ''
+        if target_dpi:
+            prepared = preprocess_for_ocr(image, target_dpi, to_binary)
+            config = f"--dpi {round(prepared.info['dpi'][0])}"
+        pre = time.perf_counter() - start
+
+        start = time.perf_counter()
+        text = pytesseract.image_to_string(prepared, config=config)
+        ocr = time.perf_counter() - start
+
+        best_pre = pre if best_pre is None else min(best_pre, pre)
+        best_ocr = ocr if best_ocr is None else min(best_ocr, ocr)
+    return best_pre, best_ocr, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--image', default=DEFAULT_IMAGE)
+    parser.add_argument('--reference', help='file with the correct text of the image')
+    parser.add_argument('--dpi', type=int, nargs='+', default=[200, 300])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per variant; the fastest counts')
+    parser.add_argument('--simulate-photo', action='store_true',
+                        help='upscale the image to 12 MP first, like an uncompressed phone photo')
+    args = parser.parse_args()
+
+    image = Image.open(args.image)
+    image.load()
+    if args.simulate_photo:
+        image = simulate_photo(image)
+    print(f"{args.image}: {image.width}x{image.height} {image.mode}, "
+          f"{effective_dpi(image):.0f} dpi effective, best of {args.repeat}")
+
+    variants = [('raw', None, False)]
+    for dpi in args.dpi:
+        variants.append((f'{dpi} dpi gray', dpi, False))
+        variants.append((f'{dpi} dpi binary', dpi, True))
+
+    results = [(name, *run(image, args.repeat, dpi, to_binary)) for name, dpi, to_binary in variants]
+
+    if args.reference:
+        with open(args.reference, encoding='utf-8') as f:
+            reference = f.read()
+    else:
+        reference = results[0][3]
+        print("no --reference given; accuracy is agreement with the raw OCR")
+
+    raw_total = results[0][1] + results[0][2]
+    print(f"{'variant':<16} {'prep s':>7} {'ocr s':>7} {'total s':>8} {'speedup':>8} {'similar':>8} {'words':>6}")
+    for name, pre, ocr, text in results:
+        ratio, recall = accuracy(text, reference)
+        total = pre + ocr
+        print(f"{name:<16} {pre:>7.3f} {ocr:>7.3f} {total:>8.3f} {raw_total / total:>7.2f}x "
+              f"{ratio:>8.3f} {recall:>6.1%}")
+
+
+if __name__ == '__main__':
+    main()
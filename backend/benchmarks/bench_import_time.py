@@ -0,0 +1,84 @@
+"""Profile the cold import of a backend module with python -X importtime.
+
+Imports the module in fresh interpreters, reports the median wall time and
+the packages that took longest, and checks that the document processing
+libraries are not imported up front. Exits with status 1 when a forbidden
+package is imported or the median exceeds --budget-ms.
+
+Usage (from the backend directory):
+    python benchmarks/bench_import_time.py --module app --repeat 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed once a document is processed, so loaded on first use
+DEFERRED_PACKAGES = ['PIL', 'pytesseract', 'tesserocr', 'pdf2image', 'PyPDF2',
+                     'pillow_heif', 'googletrans', 'httpx', 'numpy']
+
+_PROBE = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def profile_import(module):
+    """Import module in a new interpreter; return wall seconds and self time per package"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    self_us = Counter()
+    for line in completed.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        self_us[name.strip().split('.')[0]] += int(self_time)
+    return float(completed.stdout.strip().splitlines()[-1]), self_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=12, help='number of packages to list')
+    parser.add_argument('--budget-ms', type=float, help='fail when the median import takes longer')
+    args = parser.parse_args()
+
+    walls = []
+    totals = Counter()
+    imported = set()
+    for _ in range(args.repeat):
+        wall, self_us = profile_import(args.module)
+        walls.append(wall)
+        totals.update(self_us)
+        imported.update(self_us)
+
+    median_ms = statistics.median(walls) * 1000
+    print(f"import {args.module}: median {median_ms:.0f} ms, "
+          f"min {min(walls) * 1000:.0f} ms over {args.repeat} cold runs")
+    print(f"{'package':<24} {'self ms':>8}")
+    for package, us in totals.most_common(args.top):
+        print(f"{package:<24} {us / args.repeat / 1000:>8.1f}")
+
+    failed = False
+    eager = [package for package in DEFERRED_PACKAGES if package in imported]
+    if eager:
+        print(f"FAIL: imported at start-up: {', '.join(eager)}")
+        failed = True
+    if args.budget_ms and median_ms > args.budget_ms:
+        print(f"FAIL: median {median_ms:.0f} ms is over the {args.budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Compare extracting uploads from a spooled file with extracting them from memory.
+
+For each file, times the spooled path (write to --spool-dir, extract from
+the file, delete it) against extraction straight from the uploaded bytes.
+Point --spool-dir at a network-attached disk to see the round trip that
+the in-memory path saves; PDFs whose pages need OCR are spooled either way.
+
+Usage (from the backend directory):
+    python benchmarks/bench_inmemory_extraction.py --files test_data/Bild.jpg test_data/MATRULLO_ZOE_20240925_5639.pdf
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.ocr_processing import extract_text_from_file
+from utils.upload_spool import UploadSpool
+
+TEST_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test_data')
+DEFAULT_FILES = [os.path.join(TEST_DATA, 'Bild.jpg'), os.path.join(TEST_DATA, 'MATRULLO_ZOE_20240925_5639.pdf')]
+
+
+def best_of(repeat, run):
+    """Return (fastest seconds, text) over repeat runs"""
+    best = None
+    text = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text, _ = run()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', nargs='+', default=DEFAULT_FILES)
+    parser.add_argument('--spool-dir', help='directory to spool to (default: a temporary directory)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant; the fastest counts')
+    args = parser.parse_args()
+
+    spool = UploadSpool(args.spool_dir or tempfile.mkdtemp(prefix='spool-bench-'), sweep_interval=0)
+    print(f"spool directory {spool.directory}, best of {args.repeat}")
+    print(f"{'file':<40} {'bytes':>10} {'spooled s':>10} {'memory s':>9} {'speedup':>8} {'same':>5}")
+    for path in args.files:
+        ext = os.path.splitext(path)[-1].lower()
+        with open(path, 'rb') as f:
+            file_data = f.read()
+
+        def spooled():
+            with spool.spooled(file_data, ext) as spooled_path:
+                return extract_text_from_file(spooled_path, ext)
+
+        spooled_seconds, spooled_text = best_of(args.repeat, spooled)
+        memory_seconds, memory_text = best_of(args.repeat, lambda: extract_text_from_file(file_data, ext))
+        print(f"{os.path.basename(path)[:40]:<40} {len(file_data):>10} {spooled_seconds:>10.3f} "
+              f"{memory_seconds:>9.3f} {spooled_seconds / memory_seconds:>7.2f}x "
+              f"{'yes' if spooled_text == memory_text else 'no':>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compare per-page OCR time of the pytesseract and tesserocr backends.
+
+pytesseract starts the tesseract binary for every page; tesserocr reuses one
+initialised engine. Both OCR the same rasterised pages of the test PDF, one
+at a time on a single thread, so the difference is the per-call start-up.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ocr_backends.py --pages 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf2image import convert_from_path
+from PIL import Image
+from utils.ocr_engine import BACKENDS, image_to_string
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'test_data', 'MATRULLO_ZOE_20240925_5639.pdf')
+
+
+def warm_up(backend):
+    """OCR a blank page once, which loads the engine; None if the backend is unavailable"""
+    start = time.perf_counter()
+    try:
+        image_to_string(Image.new('L', (64, 64), 255), backend=backend)
+    except Exception as e:
+        print(f"{backend}: unavailable ({e})")
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf', default=DEFAULT_PDF)
+    parser.add_argument('--pages', type=int, default=8, help='number of pages to OCR per backend')
+    parser.add_argument('--dpi', type=int, default=200)
+    args = parser.parse_args()
+
+    source_pages = convert_from_path(args.pdf, dpi=args.dpi)
+    images = [source_pages[i % len(source_pages)] for i in range(args.pages)]
+    print(f"{args.pdf}: OCR of {len(images)} pages at {args.dpi} dpi per backend")
+    print(f"{'backend':<12} {'warm-up s':>9} {'median s':>9} {'mean s':>8} {'pages/s':>8}")
+
+    outputs = {}
+    for backend in BACKENDS:
+        # Engine start-up is reported on its own and not counted per page
+        startup = warm_up(backend)
+        if startup is None:
+            continue
+        times = []
+        texts = []
+        for image in images:
+            start = time.perf_counter()
+            texts.append(image_to_string(image, dpi=args.dpi, backend=backend))
+            times.append(time.perf_counter() - start)
+        outputs[backend] = texts
+        print(f"{backend:<12} {startup:>9.3f} {statistics.median(times):>9.3f} "
+              f"{statistics.mean(times):>8.3f} {len(times) / sum(times):>8.2f}")
+
+    if len(outputs) == 2:
+        first, second = (outputs[backend] for backend in BACKENDS)
+        differing = sum(a.strip() != b.strip() for a, b in zip(first, second))
+        if differing:
+            print(f"warning: {differing} page(s) differ between the backends")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Measure how page OCR scales with the number of pool workers.
+
+Rasterises the bundled test PDF, repeats its pages to build a longer
+scanned (image-only) PDF, and OCRs it with ocr_pdf_pages, as uploads are,
+with 1, 2, 4, ... workers. Each worker rasterises its own window of pages.
+
+Usage (from the backend directory):
+    python benchmarks/bench_parallel_ocr.py --pages 16 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf2image import convert_from_path
+from config import PDF_RASTER_WINDOW
+from utils.ocr_processing import ocr_pdf_pages
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'test_data', 'MATRULLO_ZOE_20240925_5639.pdf')
+
+
+def worker_counts(max_workers):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def build_scanned_pdf(pdf, pages, dpi, path):
+    """Write a PDF of `pages` page images made from the pages of pdf; returns its page count"""
+    source_pages = convert_from_path(pdf, dpi=dpi)
+    images = [source_pages[i % len(source_pages)] for i in range(pages)]
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=dpi)
+    for image in source_pages:
+        image.close()
+    return len(source_pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf', default=DEFAULT_PDF)
+    parser.add_argument('--pages', type=int, default=8, help='number of pages to OCR')
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--window', type=int, default=PDF_RASTER_WINDOW, help='pages rasterised at a time')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    scanned = tempfile.NamedTemporaryFile(suffix='.pdf', delete=False)
+    scanned.close()
+    try:
+        run(args, scanned.name)
+    finally:
+        os.remove(scanned.name)
+
+
+def run(args, path):
+    source_pages = build_scanned_pdf(args.pdf, args.pages, args.dpi, path)
+    page_numbers = list(range(1, args.pages + 1))
+    print(f"{args.pdf}: {source_pages} source page(s), OCR of {args.pages} scanned pages at {args.dpi} dpi, "
+          f"window {args.window}")
+    print(f"{'workers':>8} {'seconds':>9} {'pages/s':>8} {'speedup':>8} {'efficiency':>10}")
+
+    baseline = None
+    reference = None
+    for workers in worker_counts(args.max_workers):
+        # Warm the pool so process start-up is not part of the measurement
+        ocr_pdf_pages(path, page_numbers[:workers], workers=workers, dpi=args.dpi, window=1)
+
+        start = time.perf_counter()
+        texts = ocr_pdf_pages(path, page_numbers, workers=workers, dpi=args.dpi, window=args.window)
+        elapsed = time.perf_counter() - start
+
+        if None in texts:
+            print(f"warning: {texts.count(None)} page(s) failed to rasterise or OCR with {workers} workers")
+        if reference is None:
+            reference = texts
+        elif texts != reference:
+            print(f"warning: output with {workers} workers differs from the serial run")
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{workers:>8} {elapsed:>9.2f} {args.pages / elapsed:>8.2f} {speedup:>8.2f} {speedup / workers:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
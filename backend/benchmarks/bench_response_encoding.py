@@ -0,0 +1,122 @@
+"""Measure upload result payload size and serialization time before and after projection.
+
+Builds the result body of a long document (the words of the bundled test
+PDF shuffled into --pages pages, so that pages and languages do not repeat
+each other verbatim, in three languages) and encodes it as the API
+did before (the full body through Flask's default json.dumps settings) and
+as it does now (duplicates left out, orjson when installed), plus a
+summaries-only ?fields= projection. Reports the body size raw, gzipped and
+brotli-compressed, and the median encoding and compression times.
+
+Usage (from the backend directory):
+    python benchmarks/bench_response_encoding.py --pages 20
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.compression import BROTLI_QUALITY, GZIP_LEVEL
+from utils.json_encoding import encode, orjson
+from utils.ocr_processing import PAGE_HEADER, extract_text_from_file
+from utils.result_fields import parse_fields, project_result
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           'test_data', 'MATRULLO_ZOE_20240925_5639.pdf')
+
+
+def shuffled_document(page_text, pages, seed):
+    words = page_text.split(' ')
+    rng = random.Random(seed)
+    text = ""
+    for number in range(1, pages + 1):
+        rng.shuffle(words)
+        text += PAGE_HEADER.format(number) + ' '.join(words)
+    return text
+
+
+def build_result(page_text, pages):
+    """A result body shaped like _build_result's, for a document of the given length"""
+    text = shuffled_document(page_text, pages, 'it')
+    summary = page_text[:1500]
+    ai_response = {
+        "document_type": "Lab Report",
+        "document_type_confidence": 0.93,
+        "original_language": {"code": "it", "name": "Italian"},
+        "translations": {
+            "original": {"code": "it", "name": "Italian", "text": text},
+            "english": {"code": "en", "name": "English", "text": shuffled_document(page_text, pages, 'en'),
+                        "translated": True},
+            "german": {"code": "de", "name": "German", "text": shuffled_document(page_text, pages, 'de'),
+                       "translated": True}
+        },
+        "summaries": {"english": summary, "german": summary},
+        "languages": ["english", "german"]
+    }
+    return {
+        "message": "Document uploaded and processed successfully",
+        "content_hash": "0" * 64,
+        "cached": False,
+        "document_id": 1,
+        "extracted_text": text,
+        "pages": [{"page": number, "method": "text_layer", "chars": len(page_text)} for number in range(1, pages + 1)],
+        "ai_response": ai_response,
+        "structured_data": {"summary": ai_response}
+    }
+
+
+def median_seconds(repeat, run):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pdf', default=DEFAULT_PDF)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    text, _ = extract_text_from_file(args.pdf, '.pdf')
+    page_text = text.split(PAGE_HEADER.format(1), 1)[-1].split(PAGE_HEADER.format(2), 1)[0]
+    result = build_result(page_text, args.pages)
+    print(f"{args.pages} pages of {len(page_text)} characters, orjson {'on' if orjson else 'not installed'}, "
+          f"median of {args.repeat}")
+
+    variants = [
+        ("before: full, json", lambda: json.dumps(result, sort_keys=True, separators=(',', ':')).encode('utf-8')),
+        ("after: default, fast", lambda: encode(project_result(result))),
+        ("after: ?fields=summaries", lambda: encode(project_result(
+            result, parse_fields('document_id,ai_response.document_type,ai_response.summaries')))),
+    ]
+
+    print(f"{'variant':<26} {'bytes':>10} {'gzip':>9} {'br':>9} {'encode ms':>10} {'gzip ms':>8} {'br ms':>7}")
+    for name, run in variants:
+        body = run()
+        encode_ms = median_seconds(args.repeat, run) * 1000
+        gzipped = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        gzip_ms = median_seconds(args.repeat, lambda: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)) * 1000
+        if brotli is not None:
+            br_size = f"{len(brotli.compress(body, quality=BROTLI_QUALITY)):>9}"
+            br_ms = f"{median_seconds(args.repeat, lambda: brotli.compress(body, quality=BROTLI_QUALITY)) * 1000:>7.1f}"
+        else:
+            br_size, br_ms = f"{'-':>9}", f"{'-':>7}"
+        print(f"{name:<26} {len(body):>10} {len(gzipped):>9} {br_size} {encode_ms:>10.2f} {gzip_ms:>8.1f} {br_ms}")
+
+
+if __name__ == '__main__':
+    main()
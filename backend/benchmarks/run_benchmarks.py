@@ -0,0 +1,336 @@
+"""Time the document pipeline over the test data and synthetic PDFs, and save the results as JSON.
+
+Each input runs in a fresh process, so caches start cold and peak RSS
+belongs to that input alone. The network translator is replaced by a stub
+that echoes its input after an optional simulated delay. Every run reports
+wall time, time per pipeline stage, CPU time, peak RSS and throughput.
+Inputs whose extraction failed (e.g. Tesseract or poppler missing) or
+whose processing returned an error are reported as failed, without
+timings, and make the script exit with status 1. Pass --compare with an earlier results file to flag regressions.
+
+Usage (from the backend directory):
+    python benchmarks/run_benchmarks.py --synthetic-pages 1,10 --repeat 3 --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json --threshold 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+TEST_DATA = os.path.join(BACKEND_DIR, 'test_data')
+TEST_FILES = ['Bild.jpg', 'IMG_4096.HEIC', 'MATRULLO_ZOE_20240925_5639.pdf']
+
+SYNTHETIC_LINES = [
+    "Patient: {name}    Date of birth: {d:02d}/{m:02d}/19{y}",
+    "Collected on {d:02d}/{m:02d}/2024, reported {d:02d}/{m:02d}/2024",
+    "Hemoglobin: {v}.{d} g/dL (Reference range: 12.0 - 16.0 g/dL)",
+    "Glucose: {v} mg/dL (Reference range: 70 - 99 mg/dL)",
+    "HbA1c: {d}.{m} % (Reference range: 4.0 - 5.6 %)",
+    "Cholesterol: {v} mg/dL  LDL: {y} mg/dL  HDL: {d} mg/dL",
+    "Metformin {v} mg twice daily. Take one tablet after meals.",
+    "Assessment: results discussed with the patient, follow-up in {d} weeks.",
+]
+NAMES = ["John Doe", "Maria Rossi", "Alice Smith", "Karl Becker"]
+
+
+# ------------------------------
+# Synthetic inputs
+# ------------------------------
+
+def synthetic_page_lines(rng, count=40):
+    return [
+        rng.choice(SYNTHETIC_LINES).format(
+            name=rng.choice(NAMES), d=rng.randint(1, 28), m=rng.randint(1, 12),
+            y=rng.randint(40, 99), v=rng.randint(60, 250)
+        )
+        for _ in range(count)
+    ]
+
+
+def _pdf_escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path, pages):
+    """Write a PDF whose pages carry a real text layer, one list of lines per page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        content = "BT /F1 10 Tf 14 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) '" for line in lines) + " ET"
+        stream = content.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+                       b"/Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % page_id for page_id in page_ids), len(page_ids))
+
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(body)
+
+
+def write_scanned_pdf(path, pages, dpi=150):
+    """Write an image-only PDF, as a scanner would, so every page needs OCR"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.load_default(size=int(dpi * 0.14))
+    images = []
+    for lines in pages:
+        image = Image.new('L', (int(8.5 * dpi), int(11 * dpi)), 255)
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(lines):
+            draw.text((int(0.7 * dpi), int(0.7 * dpi) + row * int(dpi * 0.22)), line, fill=0, font=font)
+        images.append(image)
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=dpi)
+
+
+def synthetic_cases(directory, page_counts, kinds, seed=0):
+    rng = random.Random(seed)
+    cases = []
+    for count in page_counts:
+        pages = [synthetic_page_lines(rng) for _ in range(count)]
+        for kind in kinds:
+            path = os.path.join(directory, f"synthetic_{kind}_{count}p.pdf")
+            if kind == 'text':
+                write_text_pdf(path, pages)
+            else:
+                write_scanned_pdf(path, pages)
+            cases.append({"name": os.path.basename(path), "path": path, "pages": count})
+    return cases
+
+
+# ------------------------------
+# One input, in its own process
+# ------------------------------
+
+class _StubTranslation:
+    def __init__(self, text):
+        self.text = text
+
+
+class _StubTranslator:
+    """Stands in for googletrans: echoes the text after a fixed delay"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def translate(self, text, src=None, dest=None):
+        if self.latency:
+            time.sleep(self.latency)
+        return _StubTranslation(text)
+
+
+def _peak_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(case, repeat, translate_latency):
+    """Run the upload pipeline on one file repeatedly and return its measurements"""
+    from utils import ocr_processing
+    from utils.metrics import request_timings, start_request_timing
+
+    stub = _StubTranslator(translate_latency)
+    ocr_processing._get_translator = lambda: stub
+
+    ext = os.path.splitext(case["path"])[-1].lower()
+    runs = []
+    for _ in range(repeat):
+        # Every run starts without memoized translations or languages
+        ocr_processing._translation_memo.clear()
+        ocr_processing._language_memo.clear()
+        start_request_timing()
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        text, pages = ocr_processing.extract_text_from_file(case["path"], ext)
+        response = ocr_processing.process_text_with_gemini(text)
+        wall = time.perf_counter() - start
+        runs.append({
+            "wall_seconds": round(wall, 4),
+            "cpu_seconds": round(time.process_time() - cpu_start, 4),
+            "stages": {stage: round(seconds, 4) for stage, seconds in request_timings().items()},
+            "pages": len(pages),
+            "ocr_pages": sum(page["method"] == "ocr" for page in pages),
+            "characters": len(text),
+            "document_type": response.get("document_type"),
+            "extraction_failed": ocr_processing.extraction_failed(text, pages),
+            "error": response.get("error")
+        })
+
+    # Shut the OCR pools down so their peak memory is counted under children
+    for executor in ocr_processing._ocr_executors.values():
+        executor.shutdown()
+
+    return {
+        "name": case["name"],
+        "runs": runs,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "peak_rss_children_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+
+
+def summarize(result):
+    """Add medians and throughput to one input's raw runs"""
+    runs = result["runs"]
+    wall = statistics.median(run["wall_seconds"] for run in runs)
+    stages = sorted({stage for run in runs for stage in run["stages"]})
+    last = runs[-1]
+    result["summary"] = {
+        "wall_seconds_median": round(wall, 4),
+        "wall_seconds_min": min(run["wall_seconds"] for run in runs),
+        "cpu_seconds_median": round(statistics.median(run["cpu_seconds"] for run in runs), 4),
+        "stages_median": {
+            stage: round(statistics.median(run["stages"].get(stage, 0.0) for run in runs), 4)
+            for stage in stages
+        },
+        "pages_per_second": round(last["pages"] / wall, 3) if wall else None,
+        "characters_per_second": round(last["characters"] / wall, 1) if wall else None
+    }
+    return result
+
+
+# ------------------------------
+# Driver
+# ------------------------------
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    from config import OCR_WORKERS, PDF_RASTER_DPI, PDF_RASTER_WINDOW, TRANSLATION_WORKERS
+    from utils.ocr_processing import PIPELINE_VERSION
+    return {
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "git_commit": _git_commit(),
+        "pipeline_version": PIPELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {
+            "OCR_WORKERS": OCR_WORKERS,
+            "PDF_RASTER_DPI": PDF_RASTER_DPI,
+            "PDF_RASTER_WINDOW": PDF_RASTER_WINDOW,
+            "TRANSLATION_WORKERS": TRANSLATION_WORKERS
+        }
+    }
+
+
+def run_in_subprocess(case, args):
+    command = [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case),
+               '--repeat', str(args.repeat), '--translate-latency-ms', str(args.translate_latency_ms)]
+    completed = subprocess.run(command, cwd=BACKEND_DIR, capture_output=True, text=True)
+    if completed.returncode != 0:
+        return {"name": case["name"], "error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+    # The measurements are the last line; anything before it is pipeline logging
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    for run in result["runs"]:
+        if run["error"] or run["extraction_failed"]:
+            # Timings of a pipeline that produced nothing are not comparable
+            result["error"] = run["error"] or "text extraction failed"
+            return result
+    return summarize(result)
+
+
+def compare(current, previous, threshold):
+    """Print the change in median wall time per input; return the inputs that regressed"""
+    before = {case["name"]: case for case in previous["cases"] if "summary" in case}
+    regressions = []
+    print(f"\n{'input':<40} {'before':>9} {'after':>9} {'change':>8}")
+    for case in current["cases"]:
+        if "summary" not in case or case["name"] not in before:
+            continue
+        old = before[case["name"]]["summary"]["wall_seconds_median"]
+        new = case["summary"]["wall_seconds_median"]
+        change = (new - old) / old if old else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{case['name']:<40} {old:>8.3f}s {new:>8.3f}s {change:>+8.1%}{flag}")
+        if flag:
+            regressions.append(case["name"])
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--synthetic-pages', default='1,10', help='comma-separated page counts for synthetic PDFs')
+    parser.add_argument('--synthetic-kinds', default='text,scanned', help='text (text layer) and/or scanned (OCR)')
+    parser.add_argument('--skip-test-data', action='store_true')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--translate-latency-ms', type=float, default=0.0,
+                        help='simulated delay of each stubbed translation call')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='slowdown that counts as a regression')
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case), args.repeat, args.translate_latency_ms / 1000)))
+        return
+
+    cases = [] if args.skip_test_data else [
+        {"name": name, "path": os.path.join(TEST_DATA, name)} for name in TEST_FILES
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        page_counts = [int(count) for count in args.synthetic_pages.split(',') if count.strip()]
+        kinds = [kind.strip() for kind in args.synthetic_kinds.split(',') if kind.strip()]
+        cases += synthetic_cases(directory, page_counts, kinds)
+
+        results = {"environment": environment(), "settings": vars(args), "cases": []}
+        print(f"{'input':<40} {'wall (s)':>9} {'cpu (s)':>8} {'pages/s':>8} {'RSS MB':>7}  slowest stages")
+        for case in cases:
+            result = run_in_subprocess(case, args)
+            results["cases"].append(result)
+            if "summary" not in result:
+                print(f"{case['name']:<40} failed: {result['error']}")
+                continue
+            summary = result["summary"]
+            slowest = sorted(summary["stages_median"].items(), key=lambda item: -item[1])[:3]
+            rss = max(result["peak_rss_mb"], result["peak_rss_children_mb"])
+            print(f"{case['name']:<40} {summary['wall_seconds_median']:>9.3f} {summary['cpu_seconds_median']:>8.3f} "
+                  f"{summary['pages_per_second'] or 0:>8.2f} {rss:>7.1f}  "
+                  + ", ".join(f"{stage} {seconds:.3f}" for stage, seconds in slowest))
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    failed = [case["name"] for case in results["cases"] if "summary" not in case]
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        if compare(results, previous, args.threshold):
+            sys.exit(1)
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
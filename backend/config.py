@@ -15,3 +15,86 @@ PORT = int(os.environ.get('FLASK_PORT', 5050))
 
 # API settings
 BACKEND_API_URL = os.environ.get('BACKEND_API_URL', 'http://localhost:5050/api')
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+# Database for patients and processed documents
+DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(BASE_DIR, 'instance', 'medical_records.sqlite3'))
+
+# Document result cache
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', os.path.join(BASE_DIR, 'cache', 'results.sqlite3'))
+RESULT_CACHE_MEMORY_ENTRIES = int(os.environ.get('RESULT_CACHE_MEMORY_ENTRIES', 128))
+RESULT_CACHE_TTL_SECONDS = int(os.environ.get('RESULT_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Uploaded files are spooled here until their text is extracted. Files left
+# behind are deleted after the TTL, and the oldest go first over the quota.
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR', os.path.join(BASE_DIR, 'temp'))
+UPLOAD_SPOOL_TTL_SECONDS = int(os.environ.get('UPLOAD_SPOOL_TTL_SECONDS', 3600))
+UPLOAD_SPOOL_MAX_BYTES = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 1024 * 1024 * 1024))
+UPLOAD_SPOOL_SWEEP_SECONDS = int(os.environ.get('UPLOAD_SPOOL_SWEEP_SECONDS', 300))
+# Requests up to this size are parsed and extracted straight from memory
+# (see utils/upload_request.py) and only written to the spool if a scanned
+# PDF has to be rasterised
+UPLOAD_MEMORY_MAX_BYTES = int(os.environ.get('UPLOAD_MEMORY_MAX_BYTES', 16 * 1024 * 1024))
+
+# Asynchronous document jobs (POST /api/documents/upload?async=1)
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', os.path.join(BASE_DIR, 'cache', 'jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_SIZE = int(os.environ.get('JOB_QUEUE_SIZE', 16))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get('JOB_RESULT_TTL_SECONDS', 3600))
+
+# Batch uploads (POST /api/documents/upload-batch)
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 20))
+
+# ASGI server (asgi.py): processes for text extraction and threads for
+# translation, summaries and database work, per worker
+ASGI_EXTRACT_WORKERS = int(os.environ.get('ASGI_EXTRACT_WORKERS', 2))
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', 32))
+
+# Streamed uploads (?stream=1) send a keep-alive comment after this many quiet seconds
+SSE_KEEPALIVE_SECONDS = int(os.environ.get('SSE_KEEPALIVE_SECONDS', 15))
+
+# OCR settings. OCR_WORKERS is the OCR pool of each gunicorn worker, shared
+# by its requests; job and ASGI extraction workers OCR one page at a time.
+# Per server worker that is OCR_WORKERS + JOB_WORKERS Tesseract processes
+# (ASGI_EXTRACT_WORKERS + JOB_WORKERS with hypercorn), so with several
+# gunicorn workers set it to about the CPU count divided by their number
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', os.cpu_count() or 1))
+# 'tesserocr' keeps an initialised Tesseract engine per worker thread,
+# 'pytesseract' runs the tesseract binary per page, and 'auto' uses
+# tesserocr when it is installed
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'auto')
+OCR_LANGUAGE = os.environ.get('OCR_LANGUAGE', 'eng')
+# Pages whose PDF text layer has fewer alphanumeric characters than this are OCRed
+PDF_TEXT_MIN_CHARS = int(os.environ.get('PDF_TEXT_MIN_CHARS', 25))
+# Scanned pages are rasterised at this DPI, this many pages at a time per OCR worker
+PDF_RASTER_DPI = int(os.environ.get('PDF_RASTER_DPI', 200))
+PDF_RASTER_WINDOW = int(os.environ.get('PDF_RASTER_WINDOW', 1))
+# Photos and image uploads are rotated upright, downscaled to this DPI,
+# converted to grayscale and, with IMAGE_BINARIZE=1, binarized before OCR.
+# Binarization stays off by default until benchmarks/bench_image_preprocessing.py
+# --reference has shown on real uploads that it does not cost accuracy.
+IMAGE_PREPROCESS = os.environ.get('IMAGE_PREPROCESS', '1') == '1'
+IMAGE_OCR_DPI = int(os.environ.get('IMAGE_OCR_DPI', 300))
+IMAGE_BINARIZE = os.environ.get('IMAGE_BINARIZE', '0') == '1'
+
+# Translation settings
+TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS', 4))
+TRANSLATION_MEMO_ENTRIES = int(os.environ.get('TRANSLATION_MEMO_ENTRIES', 2048))
+
+# Language detection: memoized results, and per-page detection so that only
+# the pages of a mixed-language PDF that are not English get translated
+LANGUAGE_MEMO_ENTRIES = int(os.environ.get('LANGUAGE_MEMO_ENTRIES', 1024))
+DETECT_LANGUAGE_PER_PAGE = os.environ.get('DETECT_LANGUAGE_PER_PAGE', '0') == '1'
+
+# Metrics: per-process files merged by GET /metrics, and an optional
+# Server-Timing header with the stage durations of each request
+METRICS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR', os.path.join(BASE_DIR, 'cache', 'metrics'))
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '0') == '1'
+
+# Responses: JSON bodies of at least this size are compressed with brotli or
+# gzip for clients that accept it (turn off when a proxy compresses instead)
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', '1') == '1'
+RESPONSE_COMPRESSION_MIN_BYTES = int(os.environ.get('RESPONSE_COMPRESSION_MIN_BYTES', 1024))
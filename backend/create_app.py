@@ -1,19 +1,48 @@
 from flask import Flask
 from flask_cors import CORS
 import os
-from config import SECRET_KEY
+from config import SECRET_KEY, DATABASE_URL, SERVER_TIMING, RESPONSE_COMPRESSION, RESPONSE_COMPRESSION_MIN_BYTES
+from extensions import db, create_sqlite_directory
+from utils.document_search import setup_search_index
+from utils import compression, metrics
+from utils.json_encoding import FastJSONProvider
+from utils.upload_request import MemoryUploadRequest
 
 def create_app():
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.request_class = MemoryUploadRequest
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
     # App configuration
     app.config['SECRET_KEY'] = SECRET_KEY
+    app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
+
+    # Set up the database; create the SQLite directory, any missing tables and the search index
+    create_sqlite_directory(app, DATABASE_URL)
+    db.init_app(app)
+    with app.app_context():
+        # Importing the models registers their tables
+        import models
+        db.create_all()
+        setup_search_index(db.engine)
 
     # Register Blueprints
     from routes.documents import documents_bp
     app.register_blueprint(documents_bp, url_prefix='/documents')
 
+    # Load the language profiles in the background, from the first request
+    # rather than at start-up, which may be before a fork
+    from utils.ocr_processing import start_language_detection_warm_up
+    app.before_request(start_language_detection_warm_up)
+
+    # Request timings, Server-Timing headers and GET /metrics
+    metrics.init_app(app, server_timing=SERVER_TIMING)
+
+    # gzip/brotli for JSON responses
+    if RESPONSE_COMPRESSION:
+        compression.init_app(app, min_bytes=RESPONSE_COMPRESSION_MIN_BYTES)
+
     # Create temp directory if it doesn't exist
     basedir = os.path.abspath(os.path.dirname(__file__))
     os.makedirs(os.path.join(basedir, 'temp'), exist_ok=True)
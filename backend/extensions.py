@@ -0,0 +1,20 @@
+import os
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
+
+# Shared SQLAlchemy instance, bound to the app in app.py
+db = SQLAlchemy()
+
+
+def create_sqlite_directory(app, database_url):
+    """Create the directory of a SQLite database file before the first connection.
+
+    Flask-SQLAlchemy resolves relative SQLite paths against the app's
+    instance folder, so the same is done here.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        return
+    path = url.database if os.path.isabs(url.database) else os.path.join(app.instance_path, url.database)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -0,0 +1,19 @@
+# gunicorn reads this file from the working directory on startup
+
+
+def on_starting(server):
+    # Start each run with empty metrics; workers write their own files from here on
+    from utils.metrics import clear_metrics_dir
+    clear_metrics_dir()
+
+
+def post_fork(server, worker):
+    # Load the language profiles in each worker, even with --preload, where
+    # the app was imported before the fork
+    from utils.ocr_processing import start_language_detection_warm_up
+    start_language_detection_warm_up()
+
+
+def child_exit(server, worker):
+    from utils.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy.orm import deferred
 from extensions import db  # Import db from extensions.py
 
 # ------------------------------
@@ -99,12 +100,35 @@ class Measurement(db.Model):
 
 
 class Document(db.Model):
+    # Re-uploading the same file for a patient returns the existing record;
+    # listings page through a patient's documents newest first
+    __table_args__ = (
+        db.UniqueConstraint('patient_id', 'content_hash', name='uq_document_patient_content_hash'),
+        db.Index('ix_document_patient_uploaded_on', 'patient_id', 'uploaded_on'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patient.id'), nullable=False)
     checkin_id = db.Column(db.Integer, db.ForeignKey('check_in.id'), nullable=True)
     type = db.Column(db.String(50))  # lab_result, medication, insurance_card
     original_filename = db.Column(db.String(200))
     file_path = db.Column(db.String(500))
-    extracted_text = db.Column(db.Text)
-    structured_data = db.Column(db.JSON)
-    uploaded_on = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the uploaded bytes
+    # The large columns are only loaded when a query asks for them
+    extracted_text = deferred(db.Column(db.Text))
+    structured_data = deferred(db.Column(db.JSON))
+    uploaded_on = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self, include=()):
+        data = {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'checkin_id': self.checkin_id,
+            'type': self.type,
+            'original_filename': self.original_filename,
+            'content_hash': self.content_hash,
+            'uploaded_on': self.uploaded_on.isoformat() if self.uploaded_on else None
+        }
+        for field in include:
+            data[field] = getattr(self, field)
+        return data
@@ -1,75 +1,473 @@
-from flask import Blueprint, request, jsonify, current_app
-from utils.ocr_processing import extract_text_from_image, extract_text_from_pdf, process_text_with_gemini, handle_heic
+from flask import Blueprint, Response, request, jsonify, current_app, url_for, stream_with_context
+from utils.ocr_processing import extract_text_from_file, process_text_with_gemini, PIPELINE_VERSION, SUPPORTED_EXTENSIONS
+from utils.ocr_processing import parse_languages, add_language_variants, extraction_failed
+from utils.result_cache import ResultCache, compute_content_hash
+from utils.upload_spool import UploadSpool
+from utils.result_fields import parse_fields, project_result
+from utils.json_encoding import dumps as json_dumps
+from utils.jobs import JobManager, JobQueueFull
+from config import RESULT_CACHE_PATH, RESULT_CACHE_MEMORY_ENTRIES, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_BYTES
+from config import JOB_STORE_PATH, JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RESULT_TTL_SECONDS
+from config import BATCH_WORKERS, BATCH_MAX_FILES, SSE_KEEPALIVE_SECONDS
+from config import UPLOAD_SPOOL_DIR, UPLOAD_SPOOL_TTL_SECONDS, UPLOAD_SPOOL_MAX_BYTES, UPLOAD_SPOOL_SWEEP_SECONDS
+from config import UPLOAD_MEMORY_MAX_BYTES
+from extensions import db
+from models import Document
+from utils.document_search import search_documents, search_supported
+from utils.metrics import stage_timer
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import load_only, undefer
+from datetime import datetime
 import os
 import base64
-import json
-import tempfile
+import queue
+import threading
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Create a blueprint for documents
 documents_bp = Blueprint('documents', __name__)
 
-# Define the route to upload a document
-@documents_bp.route('/upload', methods=['POST'])
-def upload_document():
+# Page size for document listings, and the large fields a listing can ask for
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+DOCUMENT_DETAIL_FIELDS = ['extracted_text', 'structured_data']
+
+# Processed results keyed by the SHA-256 of the uploaded bytes, shared by all workers
+result_cache = ResultCache(
+    RESULT_CACHE_PATH,
+    PIPELINE_VERSION,
+    memory_entries=RESULT_CACHE_MEMORY_ENTRIES,
+    ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    max_bytes=RESULT_CACHE_MAX_BYTES
+)
+
+# Uploaded files live here only until their text is extracted
+upload_spool = UploadSpool(
+    UPLOAD_SPOOL_DIR,
+    ttl_seconds=UPLOAD_SPOOL_TTL_SECONDS,
+    max_bytes=UPLOAD_SPOOL_MAX_BYTES,
+    sweep_interval=UPLOAD_SPOOL_SWEEP_SECONDS
+)
+
+# Background jobs for ?async=1 uploads, run on a local process pool
+job_manager = JobManager(
+    JOB_STORE_PATH,
+    max_workers=JOB_WORKERS,
+    max_queue=JOB_QUEUE_SIZE,
+    result_ttl_seconds=JOB_RESULT_TTL_SECONDS
+)
+
+# Documents of /upload-batch requests run on a bounded thread pool shared by
+# all requests in this worker; OCR itself runs in tesseract subprocesses and
+# the OCR process pool, so threads are enough to overlap documents
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+def _is_cacheable(extracted_text, pages, ai_response):
+    """Only cache and save results that did not fail somewhere in the pipeline.
+
+    A failed extraction (e.g. a broken OCR pool or poppler missing) or
+    translation (the translation API unreachable) may well succeed on the
+    next upload, so it must not be served from the cache.
+    """
+    if "error" in ai_response or ai_response.get("translation_failed"):
+        return False
+    return not extraction_failed(extracted_text, pages)
+
+def _build_result(content_hash, cached, extracted_text, pages, ai_response):
+    """Build the JSON body returned for a processed upload"""
+    return {
+        "message": "Document uploaded and processed successfully",
+        "content_hash": content_hash,
+        "cached": cached,
+        "extracted_text": extracted_text,
+        "pages": pages,
+        "ai_response": ai_response,
+        "structured_data": {"summary": ai_response}
+    }
+
+def _store_result(content_hash, extracted_text, pages, ai_response):
+    """Cache a freshly processed document and return its response body"""
+    if _is_cacheable(extracted_text, pages, ai_response):
+        result_cache.put(content_hash, {
+            "extracted_text": extracted_text,
+            "pages": pages,
+            "ai_response": ai_response
+        })
+    return _build_result(content_hash, False, extracted_text, pages, ai_response)
+
+def _save_document(app, patient_id, file_type, filename, result):
+    """Save a processed upload for the patient and return the document id.
+
+    Re-uploads of the same bytes for the same patient return the existing
+    document. Failed results are not saved, and a database error only
+    costs the document id, not the upload.
+    """
+    if not _is_cacheable(result["extracted_text"], result["pages"], result["ai_response"]):
+        return None
+
     try:
-        # Check if a file is part of the request
-        if 'file' not in request.files:
-            # Try to parse the raw data for web uploads
-            content_type = request.headers.get('Content-Type', '')
-            
-            if 'multipart/form-data' in content_type:
-                return jsonify({"message": "File not properly formatted"}), 400
-            
-            return jsonify({"message": "No file part"}), 400
+        with stage_timer('persist'), app.app_context():
+            existing = Document.query.options(load_only(Document.id)).filter_by(
+                patient_id=patient_id, content_hash=result["content_hash"])
+            document = existing.first()
+            if document is not None:
+                return document.id
 
-        file = request.files['file']
+            document = Document(
+                patient_id=patient_id,
+                type=file_type,
+                original_filename=filename,
+                content_hash=result["content_hash"],
+                extracted_text=result["extracted_text"],
+                structured_data=result["structured_data"]
+            )
+            db.session.add(document)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                # A concurrent upload of the same file may have saved it first;
+                # otherwise the row itself was rejected (e.g. an unknown patient)
+                document = existing.first()
+                if document is None:
+                    traceback.print_exc()
+                    return None
+            return document.id
+    except Exception:
+        # The upload has been processed; saving it must not fail the request
+        traceback.print_exc()
+        return None
 
-        # If no file is selected
-        if file.filename == '':
-            return jsonify({"message": "No selected file"}), 400
+def _document_recorder(app, patient_id, file_type):
+    """Return record(filename, result), which saves a result and adds its document_id.
 
-        # Get the patient_id and file_type from the request
-        patient_id = request.form.get('patient_id')
-        file_type = request.form.get('file_type')
+    The app is passed in so that record also works from job callbacks and
+    worker threads, outside of the request.
+    """
+    def record(filename, result):
+        result["document_id"] = _save_document(app, patient_id, file_type, filename, result)
+        return result
 
-        if not patient_id or not file_type:
-            return jsonify({"message": "Patient ID and file type are required"}), 400
-        
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(current_app.root_path, 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Save the file to a temporary location
-        temp_file_path = os.path.join(temp_dir, file.filename)
-        file.save(temp_file_path)
+    return record
 
+def _cached_result(content_hash, languages=None):
+    """Return the response body for an already processed upload, or None"""
+    with stage_timer('cache_lookup'):
+        cached = result_cache.get(content_hash)
+    if cached is None:
+        return None
+    # Cached results may have been built for fewer languages than requested now
+    if add_language_variants(cached["ai_response"], languages) and _is_cacheable(
+            cached["extracted_text"], cached["pages"], cached["ai_response"]):
+        result_cache.put(content_hash, cached)
+    return _build_result(content_hash, True, cached["extracted_text"],
+                         cached["pages"], cached["ai_response"])
+
+def _save_upload(file_data, ext):
+    """Spool the uploaded bytes under a unique name and return the path"""
+    with stage_timer('save'):
+        return upload_spool.save(file_data, ext)
+
+def _extraction_source(file_data, ext):
+    """Return what to extract an upload from: its bytes, or a spooled file if it is large.
+
+    Large uploads go to the spool so that they are not copied into buffers
+    and pool workers; release the result with _release_source.
+    """
+    if len(file_data) <= UPLOAD_MEMORY_MAX_BYTES:
+        return file_data
+    return _save_upload(file_data, ext)
+
+def _release_source(source):
+    if isinstance(source, str):
+        upload_spool.release(source)
+
+def _run_pipeline(file_data, ext, content_hash, languages=None, progress=None):
+    """Extract and process an upload, cache it and return the response body"""
+    source = _extraction_source(file_data, ext)
+    try:
         # Extract text from the document based on the file extension
-        ext = os.path.splitext(file.filename)[-1].lower()
-        extracted_text = ""
-
-        if ext == '.pdf':
-            extracted_text = extract_text_from_pdf(temp_file_path)
-        elif ext == '.heic':
-            jpeg_path = handle_heic(temp_file_path)
-            extracted_text = extract_text_from_image(jpeg_path)
-            os.remove(jpeg_path)  # Clean up the temp file
-        elif ext in ['.jpg', '.jpeg', '.png', '.tiff']:
-            extracted_text = extract_text_from_image(temp_file_path)
-        else:
-            return jsonify({"message": f"Unsupported file type: {ext}"}), 400
-        
-        # Process the extracted text with the AI model
-        ai_response = process_text_with_gemini(extracted_text)
+        extracted_text, pages = extract_text_from_file(source, ext, progress)
+    finally:
+        _release_source(source)
 
-        # Return the response without database storage
-        return jsonify({
-            "message": "Document uploaded and processed successfully", 
-            "file_path": temp_file_path,
-            "extracted_text": extracted_text,
-            "ai_response": ai_response,
-            "structured_data": {"summary": ai_response}
-        }), 201
+    # Process the extracted text with the AI model
+    ai_response = process_text_with_gemini(extracted_text, languages, progress)
+
+    return _store_result(content_hash, extracted_text, pages, ai_response)
+
+def _sse_event(stage, data):
+    return f"event: {stage}\ndata: {json_dumps(data)}\n\n"
+
+def _report_saved(progress, content_hash, result):
+    """Send the 'saved' stage once a recorded result has been saved as a document"""
+    if result.get("document_id") is not None:
+        progress('saved', {"content_hash": content_hash, "document_id": result["document_id"]})
+
+def _stream_upload(file_data, filename, ext, content_hash, record, languages=None, fields=None):
+    """Process an upload on a background thread and stream its stages as server-sent events.
+
+    Each stage arrives as an event named after it, with the seconds since
+    the request started in 'elapsed'. 'saved' carries the document_id once
+    the document is stored for the patient. The last event is 'result'
+    with the usual response body, or 'error'. A comment line is sent whenever the
+    pipeline is quiet for SSE_KEEPALIVE_SECONDS so proxies keep the
+    connection open.
+    """
+    events = queue.Queue()
+    started = time.time()
+
+    def progress(stage, data):
+        events.put(_sse_event(stage, dict(data, elapsed=round(time.time() - started, 3))))
+
+    def run():
+        try:
+            result = _cached_result(content_hash, languages)
+            if result is not None:
+                progress('cached', {"content_hash": content_hash})
+            else:
+                result = _run_pipeline(file_data, ext, content_hash, languages, progress)
+            record(filename, result)
+            _report_saved(progress, content_hash, result)
+            events.put(_sse_event('result', project_result(result, fields)))
+        except Exception as e:
+            traceback.print_exc()
+            events.put(_sse_event('error', {"message": f"Error processing document: {str(e)}"}))
+        finally:
+            events.put(None)
+
+    # The pipeline keeps running if the client disconnects, so its result is still cached
+    threading.Thread(target=run, name='upload-stream', daemon=True).start()
+
+    def generate():
+        while True:
+            try:
+                event = events.get(timeout=SSE_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield event
+
+    return Response(stream_with_context(generate()), status=200, mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def _submit_job(file_data, filename, ext, content_hash, record, languages, status_url):
+    """Queue an upload on the job pool, or record it from the cache; returns (body, status).
+
+    status_url(job_id) returns the URL the client polls for the job.
+    """
+    result = _cached_result(content_hash, languages)
+    if result is not None:
+        record(filename, result)
+        job_id = job_manager.create_completed(result)
+        return _job_accepted(job_id, status_url(job_id)), 202
+
+    source = _extraction_source(file_data, ext)
+    try:
+        job_id = job_manager.submit(
+            source, ext, languages,
+            lambda text, pages, response: record(
+                filename, _store_result(content_hash, text, pages, response)),
+            on_finished=lambda: _release_source(source)
+        )
+    except JobQueueFull as e:
+        _release_source(source)
+        return {"message": str(e)}, 503
+    return _job_accepted(job_id, status_url(job_id)), 202
+
+def _handle_upload(file_data, filename, record, run_async=False, languages=None, stream=False, fields=None):
+    """Process uploaded bytes, from the cache when possible, synchronously, streamed or as a job.
+
+    record saves the processed document for the patient; see _document_recorder.
+    fields is the ?fields= projection of the result body; for jobs it is
+    given when polling instead.
+    """
+    ext = os.path.splitext(filename)[-1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return jsonify({"message": f"Unsupported file type: {ext}"}), 400
+
+    content_hash = compute_content_hash(file_data)
+    if stream:
+        return _stream_upload(file_data, filename, ext, content_hash, record, languages, fields)
+
+    if run_async:
+        body, status = _submit_job(file_data, filename, ext, content_hash, record, languages,
+                                   lambda job_id: url_for('documents.get_job', job_id=job_id))
+        return jsonify(body), status
+
+    # Serve repeated uploads of the same bytes from the cache
+    result = _cached_result(content_hash, languages)
+    if result is not None:
+        return jsonify(project_result(record(filename, result), fields)), 201
+
+    result = record(filename, _run_pipeline(file_data, ext, content_hash, languages))
+    return jsonify(project_result(result, fields)), 201
+
+def _get_batch_executor():
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+        return _batch_executor
+
+def _process_batch_document(file_data, filename, content_hash, record, languages=None):
+    """Process one document of a batch upload and return (response body, status)"""
+    ext = os.path.splitext(filename)[-1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return {"message": f"Unsupported file type: {ext}"}, 400
+
+    try:
+        result = _cached_result(content_hash, languages)
+        if result is not None:
+            return record(filename, result), 201
+        return record(filename, _run_pipeline(file_data, ext, content_hash, languages)), 201
+    except Exception as e:
+        traceback.print_exc()
+        return {"message": f"Error processing document: {str(e)}"}, 500
+
+def _stream_batch(documents, record, languages=None, fields=None):
+    """Process a batch concurrently and yield one NDJSON line per finished document.
+
+    documents is a list of (filename, file_data, content_hash). Identical
+    files are processed once and reported under each of their indexes.
+    """
+    executor = _get_batch_executor()
+    futures = {}
+    for content_hash, indexes in _indexes_by_hash(documents).items():
+        filename, file_data, _ = documents[indexes[0]]
+        future = executor.submit(_process_batch_document, file_data, filename, content_hash, record, languages)
+        futures[future] = indexes
+
+    try:
+        for future in as_completed(futures):
+            body, status = future.result()
+            yield from _batch_lines(documents, futures[future], body, status, fields)
+    finally:
+        # The client went away or the response was closed; drop queued documents
+        for future in futures:
+            future.cancel()
+
+def _indexes_by_hash(documents):
+    """Group the indexes of a batch's documents by content hash, in request order"""
+    indexes_by_hash = {}
+    for index, (_, _, content_hash) in enumerate(documents):
+        indexes_by_hash.setdefault(content_hash, []).append(index)
+    return indexes_by_hash
+
+def _batch_lines(documents, indexes, body, status, fields=None):
+    """Yield the NDJSON line of a processed batch document for each index it was sent under"""
+    for index in indexes:
+        line = {"index": index, "filename": documents[index][0], "status": status}
+        line.update(project_result(body, fields) if status == 201 else body)
+        yield json_dumps(line) + "\n"
+
+def _job_accepted(job_id, status_url):
+    return {
+        "message": "Document accepted for processing",
+        "job_id": job_id,
+        "status_url": status_url
+    }
+
+# The helpers below only take the request's mappings (query string, headers,
+# form or JSON body), so the async upload views of routes/documents_async.py
+# share them with the routes here.
+
+def _flag(args, name):
+    return args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def _wants_async(args):
+    return _flag(args, 'async')
+
+def _wants_stream(args, headers):
+    """Stream progress events when asked with ?stream=1 or Accept: text/event-stream"""
+    return _flag(args, 'stream') or 'text/event-stream' in headers.get('Accept', '')
+
+def _parse_patient_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Patient ID must be a number")
+
+def _requested_languages(args, data=None):
+    """Read the optional languages parameter from the query string or request body"""
+    value = args.get('languages') or (data or {}).get('languages')
+    return parse_languages(value)
+
+def _requested_result_fields(args, data=None):
+    """Read the optional fields projection from the query string or request body"""
+    value = args.get('fields') or (data or {}).get('fields')
+    return parse_fields(value)
+
+def _upload_options(args, data):
+    """Return (patient_id, file_type, languages, fields) of an upload; raises ValueError if invalid"""
+    patient_id = data.get('patient_id')
+    file_type = data.get('file_type')
+    if not patient_id or not file_type:
+        raise ValueError("Patient ID and file type are required")
+    return (_parse_patient_id(patient_id), file_type,
+            _requested_languages(args, data), _requested_result_fields(args, data))
+
+def _uploaded_file(files, headers):
+    """Return the 'file' part of a multipart upload; raises ValueError if there is none"""
+    if 'file' not in files:
+        # Try to parse the raw data for web uploads
+        if 'multipart/form-data' in headers.get('Content-Type', ''):
+            raise ValueError("File not properly formatted")
+        raise ValueError("No file part")
+
+    file = files['file']
+    # If no file is selected
+    if file.filename == '':
+        raise ValueError("No selected file")
+    return file
+
+def _base64_upload(data):
+    """Check a base64 upload body for its required fields; raises ValueError if one is missing"""
+    if not data:
+        raise ValueError("No data in request")
+    if not isinstance(data, dict):
+        raise ValueError("Request body must be a JSON object")
+    if not data.get('filename') or not data.get('content') or not data.get('patient_id') or not data.get('file_type'):
+        raise ValueError("Missing required fields")
+
+def _batch_files(files):
+    """Return the 'files' parts of a batch upload; raises ValueError if there are none or too many"""
+    files = [file for file in files.getlist('files') if file.filename]
+    if not files:
+        raise ValueError("No files in request")
+    if len(files) > BATCH_MAX_FILES:
+        raise ValueError(f"Too many files (limit {BATCH_MAX_FILES})")
+    return files
+
+def _batch_documents(files):
+    """Read batch files into the (filename, file_data, content_hash) list _stream_batch takes"""
+    documents = []
+    for file in files:
+        file_data = file.read()
+        documents.append((file.filename, file_data, compute_content_hash(file_data)))
+    return documents
+
+# Define the route to upload a document
+@documents_bp.route('/upload', methods=['POST'])
+def upload_document():
+    try:
+        # Check that a file is part of the request, and get the patient_id and file_type
+        try:
+            file = _uploaded_file(request.files, request.headers)
+            patient_id, file_type, languages, fields = _upload_options(request.args, request.form)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        record = _document_recorder(current_app._get_current_object(), patient_id, file_type)
+        return _handle_upload(file.read(), file.filename, record,
+                              run_async=_wants_async(request.args), languages=languages,
+                              stream=_wants_stream(request.args, request.headers), fields=fields)
 
     except Exception as e:
         return jsonify({"message": f"Error processing document: {str(e)}"}), 500
@@ -79,64 +477,209 @@ def upload_document():
 @documents_bp.route('/upload-base64', methods=['POST'])
 def upload_document_base64():
     try:
-        # Get the request data
-        data = request.json
-        
-        if not data:
-            return jsonify({"message": "No data in request"}), 400
-        
-        # Extract data from the request
-        filename = data.get('filename')
-        content_base64 = data.get('content')
-        mime_type = data.get('mimeType')
-        patient_id = data.get('patient_id')
-        file_type = data.get('file_type')
-        
-        # Validate required fields
-        if not filename or not content_base64 or not patient_id or not file_type:
-            return jsonify({"message": "Missing required fields"}), 400
-        
-        # Create temp directory if it doesn't exist
-        temp_dir = os.path.join(current_app.root_path, 'temp')
-        os.makedirs(temp_dir, exist_ok=True)
-        
+        # Get the request data and validate the required fields; a body that is
+        # not JSON is answered like an empty one, as by the async route
+        data = request.get_json(silent=True)
+        try:
+            _base64_upload(data)
+            patient_id, file_type, languages, fields = _upload_options(request.args, data)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
         # Decode the base64 content
-        file_data = base64.b64decode(content_base64)
-        
-        # Save the file to a temporary location
-        temp_file_path = os.path.join(temp_dir, filename)
-        with open(temp_file_path, 'wb') as f:
-            f.write(file_data)
-        
-        # Extract text from the document based on the file extension
-        ext = os.path.splitext(filename)[-1].lower()
-        extracted_text = ""
-        
-        if ext == '.pdf':
-            extracted_text = extract_text_from_pdf(temp_file_path)
-        elif ext == '.heic':
-            jpeg_path = handle_heic(temp_file_path)
-            extracted_text = extract_text_from_image(jpeg_path)
-            os.remove(jpeg_path)  # Clean up the temp file
-        elif ext in ['.jpg', '.jpeg', '.png', '.tiff']:
-            extracted_text = extract_text_from_image(temp_file_path)
-        else:
-            return jsonify({"message": f"Unsupported file type: {ext}"}), 400
-        
-        # Process the extracted text with the AI model
-        ai_response = process_text_with_gemini(extracted_text)
-        
-        # Return the response without database storage
-        return jsonify({
-            "message": "Document uploaded and processed successfully", 
-            "file_path": temp_file_path,
-            "extracted_text": extracted_text,
-            "ai_response": ai_response,
-            "structured_data": {"summary": ai_response}
-        }), 201
+        file_data = base64.b64decode(data['content'])
+
+        record = _document_recorder(current_app._get_current_object(), patient_id, file_type)
+        return _handle_upload(file_data, data['filename'], record,
+                              run_async=_wants_async(request.args), languages=languages,
+                              stream=_wants_stream(request.args, request.headers), fields=fields)
         
     except Exception as e:
         return jsonify({"message": f"Error processing document: {str(e)}"}), 500
 
 
+# Upload several documents in one request. Each finished document is streamed
+# back as one NDJSON line, in completion order, tagged with its index in the
+# request so the client can match it to the file it sent.
+@documents_bp.route('/upload-batch', methods=['POST'])
+def upload_documents_batch():
+    try:
+        try:
+            files = _batch_files(request.files)
+            patient_id, file_type, languages, fields = _upload_options(request.args, request.form)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        record = _document_recorder(current_app._get_current_object(), patient_id, file_type)
+        documents = _batch_documents(files)
+        stream = stream_with_context(_stream_batch(documents, record, languages, fields))
+        # Ask nginx not to buffer the stream so each line reaches the client as it is written
+        return Response(stream, status=200, mimetype='application/x-ndjson',
+                        headers={"X-Accel-Buffering": "no"})
+
+    except Exception as e:
+        return jsonify({"message": f"Error processing document: {str(e)}"}), 500
+
+
+# Fetch a processed document by content hash, adding any language variants
+# that were not produced at upload time (e.g. ?languages=de)
+@documents_bp.route('/results/<content_hash>', methods=['GET'])
+def get_result(content_hash):
+    try:
+        languages = _requested_languages(request.args)
+        fields = _requested_result_fields(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    cached = result_cache.get(content_hash)
+    if cached is None:
+        return jsonify({"message": "Result not found or expired, please upload the document again"}), 404
+
+    try:
+        if add_language_variants(cached["ai_response"], languages) and _is_cacheable(
+                cached["extracted_text"], cached["pages"], cached["ai_response"]):
+            result_cache.put(content_hash, cached)
+    except Exception as e:
+        return jsonify({"message": f"Error processing document: {str(e)}"}), 500
+
+    result = _build_result(content_hash, True, cached["extracted_text"], cached["pages"], cached["ai_response"])
+    return jsonify(project_result(result, fields)), 200
+
+
+# Poll the status of an asynchronous upload
+@documents_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        fields = _requested_result_fields(request.args)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"message": "Job not found or expired"}), 404
+    if job["result"] is not None:
+        job["result"] = project_result(job["result"], fields)
+    return jsonify(job), 200
+
+
+# Report hit/miss counters for the document result cache, and the size of
+# the upload spool
+@documents_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    stats = result_cache.stats()
+    stats["upload_spool"] = upload_spool.stats()
+    return jsonify(stats), 200
+
+
+def _encode_cursor(document):
+    value = f"{document.uploaded_on.isoformat()}|{document.id}"
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    try:
+        uploaded_on, document_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(uploaded_on), int(document_id)
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def _requested_fields():
+    """Parse ?include=extracted_text,structured_data for document listings"""
+    fields = [field.strip() for field in request.args.get('include', '').split(',') if field.strip()]
+    unknown = [field for field in fields if field not in DOCUMENT_DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f"Unsupported include field: {unknown[0]}")
+    return [field for field in DOCUMENT_DETAIL_FIELDS if field in fields]
+
+
+# List a patient's documents, newest first. Pages are keyset-paginated:
+# pass the returned next_cursor as ?cursor= to get the following page.
+# The extracted text and structured data are only loaded with ?include=.
+@documents_bp.route('', methods=['GET'])
+def list_documents():
+    try:
+        patient_id = _parse_patient_id(request.args.get('patient_id'))
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError("Limit must be positive")
+        limit = min(limit, MAX_PAGE_SIZE)
+        include = _requested_fields()
+        cursor = request.args.get('cursor')
+        after = _decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    try:
+        query = Document.query.filter(Document.patient_id == patient_id)
+        if after is not None:
+            uploaded_on, document_id = after
+            query = query.filter(or_(
+                Document.uploaded_on < uploaded_on,
+                and_(Document.uploaded_on == uploaded_on, Document.id < document_id)
+            ))
+        if include:
+            query = query.options(*(undefer(getattr(Document, field)) for field in include))
+
+        # One extra row tells whether there is another page
+        documents = query.order_by(Document.uploaded_on.desc(), Document.id.desc()).limit(limit + 1).all()
+    except SQLAlchemyError as e:
+        traceback.print_exc()
+        return jsonify({"message": f"Error listing documents: {str(e)}"}), 500
+
+    next_cursor = _encode_cursor(documents[limit - 1]) if len(documents) > limit else None
+    return jsonify({
+        "documents": [document.to_dict(include) for document in documents[:limit]],
+        "next_cursor": next_cursor
+    }), 200
+
+
+# Full-text search over a patient's documents, best match first, with a
+# highlighted snippet of the matching text or summary
+@documents_bp.route('/search', methods=['GET'])
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"message": "Search query is required"}), 400
+
+    try:
+        patient_id = _parse_patient_id(request.args.get('patient_id'))
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
+
+    if not search_supported(db.engine):
+        return jsonify({"message": "Search requires the SQLite database"}), 501
+
+    try:
+        matches = search_documents(db.session.connection(), query, patient_id, limit)
+        documents = {
+            document.id: document
+            for document in Document.query.filter(Document.id.in_([match[0] for match in matches]))
+        }
+    except SQLAlchemyError as e:
+        traceback.print_exc()
+        return jsonify({"message": f"Error searching documents: {str(e)}"}), 500
+
+    results = []
+    for document_id, score, snippet in matches:
+        if document_id in documents:
+            result = documents[document_id].to_dict()
+            result.update({"score": round(score, 4), "snippet": snippet})
+            results.append(result)
+    return jsonify({"query": query, "results": results}), 200
+
+
+# Fetch one stored document with its extracted text and structured data
+@documents_bp.route('/<int:document_id>', methods=['GET'])
+def get_document(document_id):
+    try:
+        document = db.session.get(
+            Document, document_id,
+            options=[undefer(getattr(Document, field)) for field in DOCUMENT_DETAIL_FIELDS]
+        )
+    except SQLAlchemyError as e:
+        traceback.print_exc()
+        return jsonify({"message": f"Error loading document: {str(e)}"}), 500
 
+    if document is None:
+        return jsonify({"message": "Document not found"}), 404
+    return jsonify(document.to_dict(DOCUMENT_DETAIL_FIELDS)), 200
@@ -0,0 +1,260 @@
+import asyncio
+import base64
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from quart import Blueprint, Response, jsonify, request
+from quart.utils import run_sync
+
+from config import ASGI_EXTRACT_WORKERS, BATCH_WORKERS, SSE_KEEPALIVE_SECONDS
+from routes.documents import (
+    _base64_upload, _batch_documents, _batch_files, _batch_lines, _cached_result, _document_recorder,
+    _extraction_source, _indexes_by_hash, _release_source, _report_saved, _sse_event, _store_result,
+    _submit_job, _upload_options, _uploaded_file, _wants_async, _wants_stream
+)
+from utils.ocr_processing import SUPPORTED_EXTENSIONS, extract_text_from_file, init_extraction_worker
+from utils.ocr_processing import process_text_with_gemini
+from utils.result_cache import compute_content_hash
+from utils.result_fields import project_result
+
+# The upload endpoints of routes/documents.py for the ASGI server (asgi.py).
+# Each upload is a task on the event loop: extraction runs on a process
+# pool, and language detection, translation, summaries and database writes
+# run on threads, so one worker keeps many uploads in flight while they
+# wait on OCR or the translation API. Parsing, validation, job submission
+# and batch lines are shared with the Flask routes, so bodies and status
+# codes match; every other endpoint is served by the Flask app itself.
+documents_async_bp = Blueprint('documents_async', __name__)
+
+# Set by asgi.py: the Flask app whose database is used
+flask_app = None
+
+# Text extraction (PDF text layers, rasterising, Tesseract) for this worker,
+# created on first use
+_extract_executor = None
+
+# Streamed uploads keep processing after the client disconnects; the event
+# loop only holds weak references to tasks, so they are kept here
+_background_tasks = set()
+
+
+def _get_extract_executor():
+    global _extract_executor
+    if _extract_executor is None:
+        _extract_executor = ProcessPoolExecutor(
+            max_workers=ASGI_EXTRACT_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_extraction_worker
+        )
+    return _extract_executor
+
+
+async def _run_pipeline(file_data, ext, content_hash, languages=None, progress=None):
+    """Extract on the process pool, then process the text on a thread.
+
+    Small uploads are sent to the pool as bytes and large ones are spooled
+    first. Extraction happens in another process, so progress gets one
+    'extracted' stage for it instead of an event per page.
+    """
+    source = await run_sync(_extraction_source)(file_data, ext)
+    loop = asyncio.get_running_loop()
+    try:
+        extracted_text, pages = await loop.run_in_executor(
+            _get_extract_executor(), extract_text_from_file, source, ext
+        )
+    finally:
+        _release_source(source)
+    if progress is not None:
+        progress('extracted', {"pages": len(pages), "chars": len(extracted_text)})
+
+    ai_response = await run_sync(process_text_with_gemini)(extracted_text, languages, progress)
+    return await run_sync(_store_result)(content_hash, extracted_text, pages, ai_response)
+
+
+async def _process(file_data, filename, ext, content_hash, record, languages=None, progress=None):
+    """Return the saved response body for an upload, from the cache or by processing it"""
+    result = await run_sync(_cached_result)(content_hash, languages)
+    if result is not None:
+        if progress is not None:
+            progress('cached', {"content_hash": content_hash})
+    else:
+        result = await _run_pipeline(file_data, ext, content_hash, languages, progress)
+    return await run_sync(record)(filename, result)
+
+
+def _stream_upload(file_data, filename, ext, content_hash, record, languages=None, fields=None):
+    """Process an upload as a task and stream its stages as server-sent events.
+
+    The events are the same as for the Flask route, except that extraction
+    reports one 'extracted' event instead of one per page.
+    """
+    loop = asyncio.get_running_loop()
+    loop_thread = threading.get_ident()
+    events = asyncio.Queue()
+    started = time.time()
+
+    def progress(stage, data):
+        # Called on pipeline threads as well as on the event loop, where the
+        # event is queued at once so that it stays ahead of the result
+        event = _sse_event(stage, dict(data, elapsed=round(time.time() - started, 3)))
+        if threading.get_ident() == loop_thread:
+            events.put_nowait(event)
+        else:
+            loop.call_soon_threadsafe(events.put_nowait, event)
+
+    async def run():
+        try:
+            result = await _process(file_data, filename, ext, content_hash, record, languages, progress)
+            _report_saved(progress, content_hash, result)
+            events.put_nowait(_sse_event('result', project_result(result, fields)))
+        except Exception as e:
+            traceback.print_exc()
+            events.put_nowait(_sse_event('error', {"message": f"Error processing document: {str(e)}"}))
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.ensure_future(run())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+    async def generate():
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                return
+            yield event
+
+    return Response(generate(), status=200, mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _job_status_url():
+    """Return status_url(job_id) for _submit_job, which runs on a thread outside the request"""
+    # Job status is served by the Flask app under the same prefix as the uploads
+    prefix = request.path.rsplit('/', 1)[0]
+    return lambda job_id: f"{prefix}/jobs/{job_id}"
+
+
+async def _handle_upload(file_data, filename, record, run_async=False, languages=None, stream=False, fields=None):
+    """Process uploaded bytes, from the cache when possible, directly, streamed or as a job"""
+    ext = os.path.splitext(filename)[-1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return jsonify({"message": f"Unsupported file type: {ext}"}), 400
+
+    content_hash = compute_content_hash(file_data)
+    if stream:
+        return _stream_upload(file_data, filename, ext, content_hash, record, languages, fields)
+
+    if run_async:
+        body, status = await run_sync(_submit_job)(
+            file_data, filename, ext, content_hash, record, languages, _job_status_url())
+        return jsonify(body), status
+
+    result = await _process(file_data, filename, ext, content_hash, record, languages)
+    return jsonify(project_result(result, fields)), 201
+
+
+async def _process_batch_document(file_data, filename, content_hash, record, languages=None):
+    """Process one document of a batch upload and return (response body, status)"""
+    ext = os.path.splitext(filename)[-1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return {"message": f"Unsupported file type: {ext}"}, 400
+
+    try:
+        return await _process(file_data, filename, ext, content_hash, record, languages), 201
+    except Exception as e:
+        traceback.print_exc()
+        return {"message": f"Error processing document: {str(e)}"}, 500
+
+
+async def _stream_batch(documents, record, languages=None, fields=None):
+    """Process a batch as concurrent tasks and yield one NDJSON line per finished document.
+
+    At most BATCH_WORKERS documents of the batch are processed at a time.
+    Identical files are processed once and reported under each of their indexes.
+    """
+    slots = asyncio.Semaphore(BATCH_WORKERS)
+
+    async def process(content_hash, indexes):
+        filename, file_data, _ = documents[indexes[0]]
+        async with slots:
+            return indexes, await _process_batch_document(file_data, filename, content_hash, record, languages)
+
+    tasks = [asyncio.ensure_future(process(content_hash, indexes))
+             for content_hash, indexes in _indexes_by_hash(documents).items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            indexes, (body, status) = await finished
+            for line in _batch_lines(documents, indexes, body, status, fields):
+                yield line
+    finally:
+        # The client went away or the response was closed; drop waiting documents
+        for task in tasks:
+            task.cancel()
+
+
+@documents_async_bp.route('/upload', methods=['POST'])
+async def upload_document():
+    try:
+        files = await request.files
+        form = await request.form
+        try:
+            file = _uploaded_file(files, request.headers)
+            patient_id, file_type, languages, fields = _upload_options(request.args, form)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        return await _handle_upload(file.read(), file.filename, _document_recorder(flask_app, patient_id, file_type),
+                                    run_async=_wants_async(request.args), languages=languages,
+                                    stream=_wants_stream(request.args, request.headers), fields=fields)
+
+    except Exception as e:
+        return jsonify({"message": f"Error processing document: {str(e)}"}), 500
+
+
+@documents_async_bp.route('/upload-base64', methods=['POST'])
+async def upload_document_base64():
+    try:
+        data = await request.get_json(silent=True)
+        try:
+            _base64_upload(data)
+            patient_id, file_type, languages, fields = _upload_options(request.args, data)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        file_data = base64.b64decode(data['content'])
+
+        return await _handle_upload(file_data, data['filename'], _document_recorder(flask_app, patient_id, file_type),
+                                    run_async=_wants_async(request.args), languages=languages,
+                                    stream=_wants_stream(request.args, request.headers), fields=fields)
+
+    except Exception as e:
+        return jsonify({"message": f"Error processing document: {str(e)}"}), 500
+
+
+@documents_async_bp.route('/upload-batch', methods=['POST'])
+async def upload_documents_batch():
+    try:
+        files = await request.files
+        form = await request.form
+        try:
+            files = _batch_files(files)
+            patient_id, file_type, languages, fields = _upload_options(request.args, form)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+
+        record = _document_recorder(flask_app, patient_id, file_type)
+        stream = _stream_batch(_batch_documents(files), record, languages, fields)
+        return Response(stream, status=200, mimetype='application/x-ndjson',
+                        headers={"X-Accel-Buffering": "no"})
+
+    except Exception as e:
+        return jsonify({"message": f"Error processing document: {str(e)}"}), 500
@@ -0,0 +1,81 @@
+import gzip
+
+from flask import request
+
+from utils.metrics import stage_timer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# JSON bodies, upload results above all, are compressed with brotli when it
+# is installed and the client accepts it, otherwise with gzip. Streamed
+# bodies (progress events, batch lines) are left alone so that each event
+# still reaches the client as soon as it is written.
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html'}
+
+# Fast settings: the bodies are produced once per request, not cached
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def choose_encoding(accept_encodings):
+    """Pick 'br' or 'gzip' from a parsed Accept-Encoding header, or None for no compression"""
+    best, best_quality = None, 0
+    for encoding in (['br'] if brotli is not None else []) + ['gzip']:
+        quality = accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    with stage_timer('compress'):
+        if encoding == 'br':
+            return brotli.compress(data, quality=BROTLI_QUALITY)
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compressible(response):
+    return (200 <= response.status_code < 300
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 'Content-Encoding' not in response.headers)
+
+
+def init_app(app, min_bytes=1024):
+    """Compress responses of at least min_bytes for clients that accept it"""
+
+    @app.after_request
+    def _compress(response):
+        if not _compressible(response) or response.direct_passthrough or response.is_streamed:
+            return response
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None or len(data) < min_bytes:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+
+def init_async_app(app, min_bytes=1024):
+    """Compress the responses of a Quart app like init_app"""
+    from quart import request as async_request
+    from quart.utils import run_sync
+    from quart.wrappers.response import DataBody
+
+    @app.after_request
+    async def _compress(response):
+        if not _compressible(response) or not isinstance(response.response, DataBody):
+            return response
+        response.vary.add('Accept-Encoding')
+        data = await response.get_data()
+        encoding = choose_encoding(async_request.accept_encodings)
+        if encoding is None or len(data) < min_bytes:
+            return response
+        # Off the event loop: a large result takes tens of milliseconds
+        response.set_data(await run_sync(compress)(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
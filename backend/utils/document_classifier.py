@@ -0,0 +1,126 @@
+import math
+from collections import Counter, namedtuple
+
+import numpy as np
+
+# Result of classifying one document. confidence is the winning category's
+# share of all category scores, between 0 and 1.
+Classification = namedtuple('Classification', ['label', 'confidence', 'scores'])
+
+DEFAULT_LABEL = "Medical Document"
+
+# Category terms and their weights. Terms are whole tokens or two-token
+# phrases, so 'ct' no longer matches inside 'contact' and 'rx' no longer
+# matches inside 'proxy'. Terms that name the document type outright weigh
+# more than words that merely tend to appear in it. The order breaks ties.
+CATEGORY_TERMS = {
+    "Laboratory Report": {
+        'lab': 2.0, 'labs': 2.0, 'laboratory': 3.0, 'test': 1.0, 'tests': 1.0,
+        'result': 1.0, 'results': 1.0, 'blood': 1.5, 'sample': 1.5, 'specimen': 2.0,
+        'reference range': 3.0, 'reference': 1.0, 'hemoglobin': 2.0, 'glucose': 1.5,
+        'cholesterol': 1.5, 'serum': 2.0, 'urine': 1.5, 'mg/dl': 2.0, 'g/dl': 2.0,
+    },
+    "Prescription or Medication Instructions": {
+        'prescription': 3.0, 'rx': 2.0, 'take': 1.0, 'daily': 1.0, 'dose': 1.5,
+        'dosage': 2.0, 'medication': 1.5, 'tablet': 2.0, 'tablets': 2.0, 'capsule': 2.0,
+        'refill': 2.5, 'refills': 2.5, 'pharmacy': 2.5, 'twice daily': 2.0, 'mg': 0.5,
+    },
+    "Clinical Note or Assessment": {
+        'diagnosis': 2.0, 'assessment': 2.0, 'plan': 1.0, 'history': 1.5,
+        'examination': 1.5, 'chief complaint': 3.0, 'complaint': 1.0, 'symptoms': 1.0,
+        'present illness': 3.0, 'vital signs': 2.0, 'follow-up': 1.0, 'progress note': 3.0,
+    },
+    "Imaging Report": {
+        'x-ray': 3.0, 'xray': 3.0, 'mri': 3.0, 'ct': 2.5, 'scan': 1.5, 'imaging': 2.5,
+        'radiograph': 3.0, 'radiology': 3.0, 'ultrasound': 3.0, 'contrast': 1.5,
+        'findings': 1.0, 'impression': 1.0, 'mammogram': 3.0,
+    },
+    "Insurance Document": {
+        'insurance': 3.0, 'policy': 2.0, 'coverage': 2.0, 'claim': 2.0, 'claims': 2.0,
+        'member id': 3.0, 'deductible': 3.0, 'copay': 3.0, 'co-pay': 3.0,
+        'premium': 2.0, 'insured': 2.5, 'subscriber': 2.0, 'group number': 2.5,
+    },
+}
+
+# Below this score nothing is specific enough to name a category
+MIN_SCORE = 1.0
+
+CATEGORIES = list(CATEGORY_TERMS)
+VOCABULARY = sorted({term for terms in CATEGORY_TERMS.values() for term in terms})
+_TERM_INDEX = {term: index for index, term in enumerate(VOCABULARY)}
+
+# Term-by-category weight matrix; a score vector is counts @ WEIGHTS
+WEIGHTS = np.zeros((len(VOCABULARY), len(CATEGORIES)))
+for _column, _category in enumerate(CATEGORIES):
+    for _term, _weight in CATEGORY_TERMS[_category].items():
+        WEIGHTS[_TERM_INDEX[_term], _column] = _weight
+
+# The same weights as (column, weight) pairs for scoring a single text
+_TERM_WEIGHTS = {
+    term: [(column, weight) for column, weight in enumerate(WEIGHTS[index]) if weight]
+    for term, index in _TERM_INDEX.items()
+}
+
+PHRASES = [term for term in VOCABULARY if ' ' in term]
+
+# Lowercase ASCII letters, '-' and '/' make up tokens; every other ASCII
+# character separates them
+_TOKEN_CHARS = set('abcdefghijklmnopqrstuvwxyz-/')
+_SEPARATORS = {code: ' ' for code in range(128) if chr(code) not in _TOKEN_CHARS}
+
+
+def count_terms(text):
+    """Tokenise the text once and count vocabulary tokens and two-token phrases"""
+    tokens = (text or "").lower().translate(_SEPARATORS).split()
+    counts = Counter()
+    for token, count in Counter(tokens).items():
+        if token in _TERM_INDEX:
+            counts[token] = count
+
+    if PHRASES:
+        # Tokens joined by two spaces, so that " member  id " finds back-to-back
+        # repeats: each match consumes only one of the spaces around it
+        joined = '  ' + '  '.join(tokens) + '  '
+        for phrase in PHRASES:
+            count = joined.count(' ' + phrase.replace(' ', '  ') + ' ')
+            if count:
+                counts[phrase] = count
+    return counts
+
+
+def _classification(scores):
+    best = max(range(len(CATEGORIES)), key=lambda column: (scores[column], -column))
+    total = sum(scores)
+    by_category = {category: round(float(score), 4) for category, score in zip(CATEGORIES, scores)}
+    if scores[best] < MIN_SCORE:
+        return Classification(DEFAULT_LABEL, 0.0, by_category)
+    return Classification(CATEGORIES[best], round(float(scores[best] / total), 4), by_category)
+
+
+def classify_document(text):
+    """Score every category in one pass over the text and return the best one.
+
+    Repeated terms count sublinearly (1 + log n), so one word repeated on
+    every page does not outweigh several distinct signals.
+    """
+    scores = [0.0] * len(CATEGORIES)
+    for term, count in count_terms(text).items():
+        weight = 1 + math.log(count)
+        for column, term_weight in _TERM_WEIGHTS[term]:
+            scores[column] += term_weight * weight
+    return _classification(scores)
+
+
+def classify_documents(texts):
+    """Classify a batch of texts with one matrix product over their term counts"""
+    texts = list(texts)
+    counts = np.zeros((len(texts), len(VOCABULARY)))
+    for row, text in enumerate(texts):
+        for term, count in count_terms(text).items():
+            counts[row, _TERM_INDEX[term]] = count
+
+    # Same sublinear weighting as classify_document, applied to the whole matrix
+    nonzero = counts > 0
+    counts[nonzero] = 1 + np.log(counts[nonzero])
+    scores = counts @ WEIGHTS
+    return [_classification(row) for row in scores]
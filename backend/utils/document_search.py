@@ -0,0 +1,104 @@
+import re
+
+from sqlalchemy import text
+
+# Full-text index over each document's extracted text and English summary.
+# rowid is the document id. patient_id is indexed as a token too, so the
+# patient filter is part of the MATCH and FTS5 intersects it with the search
+# terms instead of reading every patient's matches; it carries no weight in
+# the BM25 rank. Triggers keep the index in step with the document table,
+# so every insert, update or delete is indexed in the same transaction.
+_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5("
+    " extracted_text, summary, patient_id,"
+    " tokenize = 'unicode61 remove_diacritics 2')",
+
+    "INSERT INTO document_fts (document_fts, rank) VALUES ('rank', 'bm25(1.0, 1.0, 0.0)')",
+
+    "CREATE TRIGGER IF NOT EXISTS document_fts_insert AFTER INSERT ON document BEGIN"
+    " INSERT INTO document_fts (rowid, extracted_text, summary, patient_id)"
+    " VALUES (new.id, new.extracted_text, json_extract(new.structured_data, '$.summary.summaries.english'),"
+    " new.patient_id);"
+    " END",
+
+    "CREATE TRIGGER IF NOT EXISTS document_fts_delete AFTER DELETE ON document BEGIN"
+    " DELETE FROM document_fts WHERE rowid = old.id;"
+    " END",
+
+    "CREATE TRIGGER IF NOT EXISTS document_fts_update"
+    " AFTER UPDATE OF extracted_text, structured_data, patient_id ON document BEGIN"
+    " DELETE FROM document_fts WHERE rowid = old.id;"
+    " INSERT INTO document_fts (rowid, extracted_text, summary, patient_id)"
+    " VALUES (new.id, new.extracted_text, json_extract(new.structured_data, '$.summary.summaries.english'),"
+    " new.patient_id);"
+    " END",
+]
+
+# Documents saved before the index existed
+_BACKFILL = (
+    "INSERT INTO document_fts (rowid, extracted_text, summary, patient_id)"
+    " SELECT id, extracted_text, json_extract(structured_data, '$.summary.summaries.english'), patient_id"
+    " FROM document WHERE id NOT IN (SELECT rowid FROM document_fts)"
+)
+
+_SEARCH = (
+    "SELECT rowid, -rank,"
+    " snippet(document_fts, -1, :mark_start, :mark_end, '…', :snippet_tokens)"
+    " FROM document_fts"
+    " WHERE document_fts MATCH :match"
+    " ORDER BY rank LIMIT :limit"
+)
+
+# Words, numbers and codes such as "HbA1c" or "LDL-C"; an optional trailing *
+# makes a prefix search
+_TERM_REGEX = re.compile(r'[^\W_]+\*?')
+
+
+def search_supported(engine):
+    return engine.dialect.name == 'sqlite'
+
+
+def setup_search_index(engine):
+    """Create the FTS5 table and its triggers if missing, and index older documents"""
+    if not search_supported(engine):
+        return False
+    with engine.begin() as conn:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text(_BACKFILL))
+    return True
+
+
+def build_match_query(query, patient_id):
+    """Turn free text into an FTS5 query for a patient's documents containing every term.
+
+    Each term is quoted, so characters that mean something in FTS5 query
+    syntax ('-', ':', parentheses, NEAR, ...) are searched for literally.
+    Returns an empty string when the text has no searchable terms.
+    """
+    terms = []
+    for term in _TERM_REGEX.findall(query or ""):
+        prefix = term.endswith('*')
+        terms.append(f'"{term.rstrip("*")}"' + ('*' if prefix else ''))
+    if not terms:
+        return ""
+    return f'patient_id : "{int(patient_id)}" AND {{extracted_text summary}} : ({" ".join(terms)})'
+
+
+def search_documents(conn, query, patient_id, limit=20, mark=('<mark>', '</mark>'), snippet_tokens=12):
+    """Return (document_id, score, snippet) rows for a patient, best match first.
+
+    score is the negated BM25 rank, so higher is better. The snippet comes from
+    whichever column matched best, with matches wrapped in mark.
+    """
+    match = build_match_query(query, patient_id)
+    if not match:
+        return []
+    rows = conn.execute(text(_SEARCH), {
+        "match": match,
+        "limit": limit,
+        "mark_start": mark[0],
+        "mark_end": mark[1],
+        "snippet_tokens": snippet_tokens
+    })
+    return [(row[0], row[1], row[2]) for row in rows]
@@ -0,0 +1,105 @@
+import re
+from collections import namedtuple
+
+# A typed span of the source text. attrs holds the parts of the match,
+# e.g. the number and unit of a quantity.
+Entity = namedtuple('Entity', ['type', 'kind', 'value', 'start', 'end', 'attrs'])
+
+# Every entity pattern, in priority order. They are joined into one
+# alternation and compiled once, so a document is scanned a single time.
+#
+# Patterns that describe a labelled value (e.g. "Effective Date: 01/02/2024")
+# only consume the label and capture the value in a lookahead. The value is
+# then scanned again as part of the same pass, so the date or quantity inside
+# it is reported as an entity of its own.
+#
+# Labels, names and units never run across a line break. The per-function
+# regexes this replaces did, and on OCR output they glued a value to the
+# first word of the next line.
+_ENTITY_PATTERNS = [
+    ('identifier', 'policy_number', r'(?i:Policy\s*(?:#|Number|No\.?|ID)):\s*(?P<policy_number>[A-Za-z0-9-]+)'),
+    ('identifier', 'member_id', r'(?i:Member\s*(?:ID|Number|#)|ID\s*Number):\s*(?P<member_id>[A-Za-z0-9-]+)'),
+    ('identifier', 'group_number', r'(?i:Group\s*(?:#|Number|No\.?)):\s*(?P<group_number>[A-Za-z0-9-]+)'),
+    ('field', 'effective_date', r'(?i:Effective\s*Date|Coverage\s*Begins):\s*(?=(?P<effective_date>[A-Za-z0-9/-]+))'),
+    ('field', 'expiration_date', r'(?i:Expiration\s*Date|Coverage\s*Ends|Expires):\s*(?=(?P<expiration_date>[A-Za-z0-9/-]+))'),
+    ('field', 'refills', r'(?i:Refills?):\s*(?P<refills>(?i:\d+|zero|none))'),
+    ('field', 'patient_name', r'(?:Name|Patient):\s*(?=(?P<patient_name>[A-Za-z][A-Za-z \t]*))'),
+    ('field', 'doctor', r'(?:Dr\.|Doctor|Physician)[\s:]*(?=(?P<doctor>[A-Za-z]+(?:[ \t]+[A-Za-z]+)*))'),
+    ('field', 'provider', r'(?i:Insurance|Provider|Carrier|Plan):\s*(?=(?P<provider>[A-Za-z][A-Za-z \t]*))'),
+    ('field', 'reference_range', r'(?i:Reference(?:[ \t]*Range)?):?[ \t]*'
+                                 r'(?=(?P<reference_range>\d+\.?\d*[ \t]*-[ \t]*\d+\.?\d*[ \t]*[a-zA-Z/%]*))'),
+    ('instruction', 'instruction', r'Take\s+(?=(?P<instruction>.+?)(?:\.|\n))'),
+    ('date', 'date', r'(?P<date>\d{1,2}/\d{1,2}/\d{2,4}|\d{1,2}-\d{1,2}-\d{2,4}'
+                     r'|[A-Za-z]{3,9}\s+\d{1,2},?\s+\d{4}|\d{1,2}\s+[A-Za-z]{3,9},?\s+\d{4})'),
+    ('labeled_value', 'labeled_value', r'(?P<lv_label>[A-Za-z][A-Za-z \t]*):[ \t]*(?=(?P<lv_number>\d+\.?\d*)[ \t]*(?P<lv_unit>[a-zA-Z/%]*))'),
+    ('medication', 'medication', r'(?P<med_name>[A-Za-z]+(?:-[A-Za-z]+)?)\s+'
+                                 r'(?=(?P<med_dose>\d+\.?\d*\s*(?:mg|mcg|g|ml|%|mg/ml|mg/g|IU)))'),
+    ('field', 'provider_name', r'(?P<provider_name>(?i:[A-Za-z]+[ \t]+(?:Insurance|Health|Life)))'),
+    ('quantity', 'quantity', r'(?P<q_number>\d+\.?\d*)[ \t]*(?P<q_unit>[a-zA-Z/%]+)'),
+]
+
+# Each alternative is wrapped in its own outer group; the outer group closes
+# last, so Match.lastgroup tells which alternative matched. Entities only
+# start at the beginning of a word, and the leading lookbehind rejects every
+# other position before any alternative is tried.
+ENTITY_REGEX = re.compile(r'(?<![A-Za-z0-9])(?:' + '|'.join(
+    f'(?P<_e{i}>{pattern})' for i, (_, _, pattern) in enumerate(_ENTITY_PATTERNS)
+) + ')')
+_ALTERNATIVES = {f'_e{i}': (entity_type, kind) for i, (entity_type, kind, _) in enumerate(_ENTITY_PATTERNS)}
+
+
+def _build_entity(match):
+    entity_type, kind = _ALTERNATIVES[match.lastgroup]
+
+    if entity_type == 'quantity':
+        number, unit = match.group('q_number'), match.group('q_unit')
+        return Entity(entity_type, kind, f"{number} {unit}", match.start(), match.end(),
+                      {"number": number, "unit": unit})
+
+    if entity_type == 'labeled_value':
+        label = match.group('lv_label').strip()
+        number, unit = match.group('lv_number'), match.group('lv_unit')
+        return Entity(entity_type, kind, f"{label}: {number} {unit}".strip(),
+                      match.start(), match.end('lv_unit'),
+                      {"label": label, "number": number, "unit": unit})
+
+    if entity_type == 'medication':
+        name, dose = match.group('med_name'), match.group('med_dose')
+        return Entity(entity_type, kind, f"{name} {dose}", match.start(), match.end('med_dose'),
+                      {"name": name, "dose": dose})
+
+    # Dates, instructions, identifiers and fields capture a single value
+    return Entity(entity_type, kind, match.group(kind), match.start(kind), match.end(kind), {})
+
+
+class ExtractedEntities:
+    """Entities found in one document, in the order they appear"""
+
+    def __init__(self, entities):
+        self.entities = entities
+        self._by_kind = {}
+        for entity in entities:
+            self._by_kind.setdefault(entity.kind, []).append(entity)
+
+    def of(self, kind):
+        """All entities of a kind, e.g. 'date', 'medication' or 'policy_number'"""
+        return self._by_kind.get(kind, [])
+
+    def values(self, kind):
+        return [entity.value for entity in self.of(kind)]
+
+    def first(self, kind, default=""):
+        """Value of the first entity of a kind, stripped, or the default"""
+        entities = self.of(kind)
+        return entities[0].value.strip() if entities else default
+
+    def __len__(self):
+        return len(self.entities)
+
+    def to_list(self):
+        return [entity._asdict() for entity in self.entities]
+
+
+def extract_entities(text):
+    """Scan the text once and return every typed entity with its offsets"""
+    return ExtractedEntities([_build_entity(match) for match in ENTITY_REGEX.finditer(text or "")])
@@ -0,0 +1,67 @@
+import numpy as np
+from PIL import Image, ImageFilter, ImageOps
+
+# DPI values below this in image metadata are placeholders (phones write 72)
+MIN_TRUSTED_DPI = 100
+
+# Long side of the page a photo is assumed to show when its DPI is unknown
+# (A4 is 11.7 in, US letter 11 in)
+PAGE_LONG_SIDE_INCHES = 11.5
+
+# Bradley thresholding: a pixel is ink when it is this much darker than the
+# mean of a window one eighth of the image wide around it
+BINARIZE_WINDOW_FRACTION = 1 / 8
+BINARIZE_OFFSET = 0.15
+
+
+def effective_dpi(image):
+    """Resolution the page was captured at, from metadata or the assumed page size"""
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0] >= MIN_TRUSTED_DPI:
+        return float(dpi[0])
+    return max(image.size) / PAGE_LONG_SIDE_INCHES
+
+
+def downscale_to_dpi(image, target_dpi):
+    """Shrink the image so the page is at most target_dpi; never upscales"""
+    dpi = effective_dpi(image)
+    if not target_dpi or dpi <= target_dpi:
+        return image
+    scale = target_dpi / dpi
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    resized = image.resize(size, Image.LANCZOS)
+    resized.info['dpi'] = (target_dpi, target_dpi)
+    return resized
+
+
+def binarize(gray):
+    """Adaptive (local mean) threshold of a grayscale image into black text on white.
+
+    Unlike one global threshold this copes with the shadows and uneven
+    lighting of phone photos. The local means come from a box blur, so the
+    cost does not grow with the window size.
+    """
+    radius = max(1, round(max(gray.size) * BINARIZE_WINDOW_FRACTION / 2))
+    pixels = np.asarray(gray, dtype=np.float32)
+    local_mean = np.asarray(gray.filter(ImageFilter.BoxBlur(radius)), dtype=np.float32)
+    ink = pixels < local_mean * (1 - BINARIZE_OFFSET)
+    return Image.fromarray(np.where(ink, 0, 255).astype(np.uint8)).convert('1', dither=Image.NONE)
+
+
+def preprocess_for_ocr(image, target_dpi=300, to_binary=True):
+    """Prepare a photo or scan for Tesseract.
+
+    Applies the EXIF orientation, downscales to target_dpi, converts to
+    grayscale and, if to_binary, binarizes adaptively. Fewer and simpler
+    pixels make OCR faster and leave less to hand over to Tesseract.
+    """
+    dpi = effective_dpi(image)
+    image = ImageOps.exif_transpose(image)
+    image.info['dpi'] = (dpi, dpi)
+    image = downscale_to_dpi(image, target_dpi)
+    dpi = image.info['dpi']
+    image = image.convert('L')
+    if to_binary:
+        image = binarize(image)
+    image.info['dpi'] = dpi
+    return image
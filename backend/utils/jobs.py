@@ -0,0 +1,215 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.ocr_processing import extract_text_from_file, init_extraction_worker, process_text_with_gemini
+from utils.ocr_processing import warm_up_language_detection
+
+
+class JobQueueFull(Exception):
+    """Raised when the worker pool already has as many jobs as it may queue"""
+
+
+class JobStore:
+    """SQLite-backed job table so that any gunicorn worker can answer a status poll"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " stage TEXT,"
+                " result TEXT,"
+                " error TEXT,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " finished_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at)")
+            self._schema_ready = True
+        return conn
+
+    def create(self, status='queued', stage='queued'):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO jobs (id, status, stage, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, status, stage, now, now)
+            )
+        finally:
+            conn.close()
+        return job_id
+
+    def update(self, job_id, status=None, stage=None, result=None, error=None):
+        now = time.time()
+        finished = status in ('succeeded', 'failed')
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE jobs SET"
+                " status = COALESCE(?, status),"
+                " stage = COALESCE(?, stage),"
+                " result = COALESCE(?, result),"
+                " error = COALESCE(?, error),"
+                " updated_at = ?,"
+                " finished_at = CASE WHEN ? THEN ? ELSE finished_at END"
+                " WHERE id = ?",
+                (status, stage, json.dumps(result) if result is not None else None,
+                 error, now, finished, now, job_id)
+            )
+        finally:
+            conn.close()
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, status, stage, result, error, created_at, updated_at, finished_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+
+        if not row:
+            return None
+
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "stage": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+            "finished_at": row[7]
+        }
+
+    def purge_expired(self, ttl_seconds):
+        """Delete finished jobs whose results are older than the TTL"""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (time.time() - ttl_seconds,)
+            )
+        finally:
+            conn.close()
+
+
+def init_job_worker():
+    init_extraction_worker()
+    warm_up_language_detection()
+
+
+def run_document_job(store_path, job_id, source, ext, languages=None):
+    """Run the extraction pipeline for one job inside a pool worker process"""
+    store = JobStore(store_path)
+    store.update(job_id, status='running', stage='extracting_text')
+    extracted_text, pages = extract_text_from_file(source, ext)
+
+    store.update(job_id, stage='processing_text')
+    ai_response = process_text_with_gemini(extracted_text, languages)
+
+    return extracted_text, pages, ai_response
+
+
+class JobManager:
+    """Runs document jobs on a local process pool with a bounded backlog.
+
+    The pool is created lazily so that each gunicorn worker gets its own
+    after forking. Job state lives in the shared JobStore.
+    """
+
+    def __init__(self, store_path, max_workers=2, max_queue=16, result_ttl_seconds=3600):
+        self.store = JobStore(store_path)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl_seconds = result_ttl_seconds
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_job_worker
+            )
+        return self._executor
+
+    def create_completed(self, result):
+        """Record a job that needed no processing, e.g. a cache hit"""
+        job_id = self.store.create(status='succeeded', stage='done')
+        self.store.update(job_id, status='succeeded', result=result)
+        return job_id
+
+    def submit(self, source, ext, languages, on_result, on_finished=None):
+        """Queue a document for processing and return its job id.
+
+        source is the path of the spooled upload or, for small uploads, its bytes.
+        on_result is called in this process with (extracted_text, pages,
+        ai_response) and returns the dict stored as the job result.
+        on_finished, if given, is called once the job has succeeded or failed.
+        """
+        self.store.purge_expired(self.result_ttl_seconds)
+
+        with self._lock:
+            if self._pending >= self.max_queue:
+                raise JobQueueFull(f"Too many documents in progress (limit {self.max_queue})")
+            self._pending += 1
+            executor = self._get_executor()
+
+        try:
+            job_id = self.store.create()
+            future = executor.submit(run_document_job, self.store.db_path, job_id, source, ext, languages)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_result, on_finished))
+        return job_id
+
+    def _finish(self, job_id, future, on_result, on_finished=None):
+        try:
+            extracted_text, pages, ai_response = future.result()
+            self.store.update(job_id, status='succeeded', stage='done',
+                              result=on_result(extracted_text, pages, ai_response))
+        except Exception as e:
+            traceback.print_exc()
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. OOM); start a fresh pool for the next job
+                with self._lock:
+                    self._executor = None
+            try:
+                self.store.update(job_id, status='failed', stage='failed', error=str(e))
+            except sqlite3.Error:
+                traceback.print_exc()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            if on_finished is not None:
+                on_finished()
+
+    def get(self, job_id):
+        self.store.purge_expired(self.result_ttl_seconds)
+        return self.store.get(job_id)
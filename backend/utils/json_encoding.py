@@ -0,0 +1,49 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response bodies are encoded with orjson when it is installed, several
+# times faster than the json module for large upload results. Datetimes
+# still go through the provider's default so they are formatted as before.
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def encode(obj, default=None):
+    """Encode obj as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the json module handles
+            pass
+    return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj, default=None):
+    """Encode obj as a compact JSON string"""
+    return encode(obj, default).decode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider for the Flask and Quart apps that encodes with orjson when it can.
+
+    Keys keep their insertion order instead of being sorted. Debug mode and
+    explicit json.dumps arguments fall back to the default provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, self.default)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(encode(obj, self.default) + b"\n", mimetype=self.mimetype)
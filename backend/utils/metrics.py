@@ -0,0 +1,148 @@
+import contextvars
+import os
+import shutil
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+from config import METRICS_DIR
+
+# prometheus_client reads this when it is imported. Every process that
+# records metrics (gunicorn workers, job and OCR pool workers) writes its own
+# files here, and /metrics merges them, so the numbers cover all workers.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', METRICS_DIR)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram(
+    'document_pipeline_stage_seconds',
+    'Time spent in each stage of the document pipeline',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    'http_request_seconds',
+    'Time until the response headers were ready, by route',
+    ['method', 'route', 'status'],
+    buckets=STAGE_BUCKETS
+)
+PAGES = Counter('document_pipeline_pages_total', 'Pages extracted, by extraction method', ['method'])
+CHARACTERS = Counter('document_pipeline_characters_total', 'Characters extracted or sent for translation', ['kind'])
+TRANSLATION_CHUNKS = Counter(
+    'document_pipeline_translation_chunks_total',
+    'Chunks translated, by whether the translation API or the memo answered',
+    ['source']
+)
+
+# Stage durations of the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+@contextmanager
+def stage_timer(stage):
+    """Time a pipeline stage; works as a with-block or as a function decorator"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+
+def start_request_timing():
+    _request_timings.set({})
+
+
+def request_timings():
+    """Stage totals in seconds recorded on this thread since start_request_timing()"""
+    return dict(_request_timings.get() or {})
+
+
+def server_timing_header(total_seconds):
+    """Format the current request's stage totals as a Server-Timing header value.
+
+    Stages run on this request's thread only; work done by pool workers is
+    part of the stage that waited for it. Nested stages overlap.
+    """
+    entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in request_timings().items()]
+    entries.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def clear_metrics_dir():
+    """Remove metric files left by an earlier run; call once, before workers start"""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def mark_process_dead(pid):
+    multiprocess.mark_process_dead(pid)
+
+
+def render_metrics():
+    """Return the merged metrics of every process and their content type"""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_app(app, server_timing=False):
+    """Time every request, optionally add a Server-Timing header, and serve GET /metrics"""
+
+    @app.before_request
+    def _start_timing():
+        g.request_started = time.perf_counter()
+        start_request_timing()
+
+    @app.after_request
+    def _record_timing(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(request.method, route, str(response.status_code)).observe(elapsed)
+        # A streamed body is still being produced, so its stages are not all known yet
+        if server_timing and not response.is_streamed:
+            response.headers['Server-Timing'] = server_timing_header(elapsed)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        payload, content_type = render_metrics()
+        return Response(payload, content_type=content_type)
+
+
+def init_async_app(app, server_timing=False):
+    """Time every request of a Quart app like init_app; /metrics stays on the Flask app.
+
+    The hooks are coroutines so that the timings are set in the request's
+    own context; Quart would run plain functions on a thread.
+    """
+    from quart import g as async_g, request as async_request
+    from quart.wrappers.response import IterableBody
+
+    @app.before_request
+    async def _start_timing():
+        async_g.request_started = time.perf_counter()
+        start_request_timing()
+
+    @app.after_request
+    async def _record_timing(response):
+        started = async_g.pop('request_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = async_request.url_rule.rule if async_request.url_rule else 'unmatched'
+        REQUEST_SECONDS.labels(async_request.method, route, str(response.status_code)).observe(elapsed)
+        if server_timing and not isinstance(response.response, IterableBody):
+            response.headers['Server-Timing'] = server_timing_header(elapsed)
+        return response
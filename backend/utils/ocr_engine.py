@@ -0,0 +1,76 @@
+import logging
+import threading
+
+from config import OCR_BACKEND, OCR_LANGUAGE
+
+# Backend fallbacks are warnings on stderr (logging's last-resort handler)
+# unless the app configures logging; pool workers have no app to log to
+logger = logging.getLogger(__name__)
+
+BACKENDS = ['tesserocr', 'pytesseract']
+
+# pytesseract starts a tesseract process for every call, which loads the
+# traineddata again each time. With tesserocr every thread keeps one
+# initialised engine and reuses it for every page and request it OCRs.
+# Engines are not thread-safe, hence one per thread; pool worker processes
+# each get their own.
+_engines = threading.local()
+
+# Backend in use in this process, chosen on first use
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _engine():
+    api = getattr(_engines, 'api', None)
+    if api is None:
+        import tesserocr
+        api = tesserocr.PyTessBaseAPI(lang=OCR_LANGUAGE)
+        _engines.api = api
+    return api
+
+
+def _select_backend():
+    if OCR_BACKEND == 'pytesseract':
+        return 'pytesseract'
+    try:
+        _engine()
+        return 'tesserocr'
+    except ImportError:
+        if OCR_BACKEND == 'tesserocr':
+            logger.warning("OCR_BACKEND=tesserocr but tesserocr is not installed; using pytesseract")
+    except Exception:
+        logger.warning("Could not start a tesserocr engine; using pytesseract", exc_info=True)
+    return 'pytesseract'
+
+
+def ocr_backend():
+    """Name of the OCR backend this process uses, 'tesserocr' or 'pytesseract'"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _select_backend()
+    return _backend
+
+
+def image_to_string(image, dpi=None, backend=None):
+    """OCR a PIL image with the configured backend (or the one given).
+
+    dpi is passed on to Tesseract when known, so it does not have to guess
+    the resolution.
+    """
+    if (backend or ocr_backend()) == 'tesserocr':
+        api = _engine()
+        api.SetImage(image)
+        if dpi:
+            api.SetSourceResolution(round(dpi))
+        try:
+            return api.GetUTF8Text()
+        finally:
+            # Drop the image and results but keep the loaded language data
+            api.Clear()
+
+    import pytesseract
+    config = f'--dpi {round(dpi)}' if dpi else ''
+    return pytesseract.image_to_string(image, lang=OCR_LANGUAGE, config=config)
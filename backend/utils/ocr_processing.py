@@ -1,64 +1,280 @@
-from PIL import Image
-import pytesseract
-from pdf2image import convert_from_path
+# PIL, pdf2image, pytesseract, googletrans, langdetect and numpy are imported
+# where they are first needed, so importing this module (and the routes that
+# use it) stays cheap for workers and requests that never process a document
+import io
 import os
-import requests  # For making HTTP requests to the API endpoint
-from flask import current_app
 import traceback
 import re
-from googletrans import Translator
-from langdetect import detect as langdetect
 import sys
+import hashlib
+import threading
+from collections import Counter
+from contextlib import contextmanager
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import GOOGLE_CLOUD_PROJECT_ID, GOOGLE_CLOUD_REGION
+from config import GOOGLE_CLOUD_PROJECT_ID, GOOGLE_CLOUD_REGION, OCR_WORKERS, PDF_TEXT_MIN_CHARS, PDF_RASTER_DPI, PDF_RASTER_WINDOW
+from config import TRANSLATION_WORKERS, TRANSLATION_MEMO_ENTRIES, LANGUAGE_MEMO_ENTRIES, DETECT_LANGUAGE_PER_PAGE
+from config import IMAGE_PREPROCESS, IMAGE_OCR_DPI, IMAGE_BINARIZE
+from config import UPLOAD_SPOOL_DIR, UPLOAD_SPOOL_TTL_SECONDS, UPLOAD_SPOOL_MAX_BYTES, UPLOAD_SPOOL_SWEEP_SECONDS
+from utils.result_cache import LRUCache
+from utils.entity_extraction import extract_entities
+from utils.section_index import SectionIndex
+from utils.metrics import stage_timer, PAGES, CHARACTERS, TRANSLATION_CHUNKS
+from utils.ocr_engine import image_to_string
 
 # Set your API endpoint and key
 PROJECT_ID = GOOGLE_CLOUD_PROJECT_ID
 REGION = GOOGLE_CLOUD_REGION
 
-# Initialize translator
-translator = Translator()
+# Bump whenever extraction, translation or summary output changes so that
+# cached results from an older pipeline are no longer served
+PIPELINE_VERSION = '14'
 
+# File extensions the upload pipeline knows how to extract text from
+SUPPORTED_EXTENSIONS = ['.pdf', '.heic', '.jpg', '.jpeg', '.png', '.tiff']
+
+# Chunk translations run on a bounded thread pool, one Translator per thread
+_translation_executor = None
+_translation_executor_lock = threading.Lock()
+_thread_local = threading.local()
+
+# Memoized chunk translations keyed by (chunk hash, source, target)
+_translation_memo = LRUCache(TRANSLATION_MEMO_ENTRIES)
+
+# Translations are requested in chunks of at most this many characters
+TRANSLATION_CHUNK_CHARS = 1000
+
+# langdetect's detect function, set once its profiles are loaded
+_langdetect = None
+_langdetect_lock = threading.Lock()
+# Process that started its warm-up thread; see start_language_detection_warm_up
+_warm_up_pid = None
+
+# Detected languages keyed by the hash of the text sample
+_language_memo = LRUCache(LANGUAGE_MEMO_ENTRIES)
+
+# Pages with less text than this take the document's main language instead
+# of being detected on their own
+PAGE_LANGUAGE_MIN_CHARS = 100
+
+# Separator between pages in the text extracted from a PDF
+PAGE_HEADER = "\n--- Page {} ---\n"
+_PAGE_HEADER_REGEX = re.compile(r'\n--- Page (\d+) ---\n')
+
+# The HEIF plugin for Pillow is registered the first time a HEIC upload arrives
+_heif_opener_registered = False
+
+# Process pools for page OCR keyed by size, created on first use in each worker process
+_ocr_executors = {}
+_ocr_executors_lock = threading.Lock()
+
+# OCR pool size when a call does not give one; 1 (OCR in the calling
+# process) inside the job and ASGI extraction pools, see init_extraction_worker
+_default_ocr_workers = OCR_WORKERS
+
+# Where PDFs extracted from memory are written when poppler needs a file,
+# created on first use in each process
+_spill_spool = None
+
+def _report(progress, stage, **data):
+    """Tell an optional progress callback that a pipeline stage finished"""
+    if progress is not None:
+        progress(stage, data)
+
+def _get_langdetect():
+    """Import langdetect and load its profiles on first use.
+
+    Callers that arrive while another thread is loading wait for it instead
+    of detecting with half-loaded profiles.
+    """
+    global _langdetect
+    if _langdetect is None:
+        with _langdetect_lock:
+            if _langdetect is None:
+                from langdetect import DetectorFactory, detect
+                from langdetect.detector_factory import init_factory
+                # langdetect samples the text randomly; a fixed seed gives the same
+                # answer for the same text in every process, so cached and fresh
+                # results agree
+                DetectorFactory.seed = 0
+                init_factory()
+                _langdetect = detect
+    return _langdetect
+
+def warm_up_language_detection():
+    """Load langdetect's language profiles now instead of during the first upload"""
+    _get_langdetect()
+
+def start_language_detection_warm_up():
+    """Load the language profiles on a background thread, once per process.
+
+    Call it in the process that serves requests, after any fork: a thread
+    started before gunicorn --preload forks its workers could hold
+    _langdetect_lock at the fork and leave it locked in every worker.
+    """
+    global _warm_up_pid
+    if _warm_up_pid == os.getpid():
+        return
+    _warm_up_pid = os.getpid()
+    threading.Thread(target=warm_up_language_detection, name='langdetect-warm-up', daemon=True).start()
+
+@stage_timer('detect_language')
 def detect_language(text):
     """Detect the language of the extracted text"""
     try:
         # Skip if text is too short or empty
         if not text or len(text) < 20:
             return 'en'
-        
+
+        sample = text[:1000]
+        key = hashlib.sha256(sample.encode('utf-8')).hexdigest()
+        language = _language_memo.get(key)
+        if language is not None:
+            return language
+
         # Try with langdetect first (more reliable)
         try:
-            return langdetect(text[:1000])
+            language = _get_langdetect()(sample)
         except:
             # Fall back to googletrans
-            detection = translator.detect(text[:1000])
+            detection = _get_translator().detect(sample)
             return detection.lang
+        _language_memo.put(key, language)
+        return language
     except Exception as e:
         traceback.print_exc()
         return 'en'  # Default to English on error
 
+def split_pages(text):
+    """Split text joined with PAGE_HEADER into (page number, page text) pairs.
+
+    Text without page headers is returned as page 1.
+    """
+    parts = _PAGE_HEADER_REGEX.split(text or "")
+    if len(parts) == 1:
+        return [(1, parts[0])]
+    return [(int(parts[i]), parts[i + 1]) for i in range(1, len(parts), 2)]
+
+def join_pages(pages):
+    return "".join(PAGE_HEADER.format(number) + text for number, text in pages)
+
+def detect_page_languages(text):
+    """Detect the language of every page of a multi-page text.
+
+    Returns the main language, the one covering the most text, and a list
+    of {"page", "code"} dicts. Pages too short to detect get the main language.
+    """
+    pages = split_pages(text)
+    detected = {}
+    characters = Counter()
+    for number, page_text in pages:
+        if len(page_text.strip()) >= PAGE_LANGUAGE_MIN_CHARS:
+            detected[number] = detect_language(page_text)
+            characters[detected[number]] += len(page_text)
+
+    main_language = characters.most_common(1)[0][0] if characters else detect_language(text)
+    return main_language, [{"page": number, "code": detected.get(number, main_language)} for number, _ in pages]
+
+def _get_translator():
+    if not hasattr(_thread_local, 'translator'):
+        from googletrans import Translator
+        _thread_local.translator = Translator()
+    return _thread_local.translator
+
+def _get_translation_executor():
+    global _translation_executor
+    with _translation_executor_lock:
+        if _translation_executor is None:
+            _translation_executor = ThreadPoolExecutor(
+                max_workers=TRANSLATION_WORKERS,
+                thread_name_prefix='translate'
+            )
+        return _translation_executor
+
+def _translate_chunk(chunk, source_lang, target_lang):
+    """Translate one chunk, reusing earlier translations of identical text"""
+    key = (hashlib.sha256(chunk.encode('utf-8')).hexdigest(), source_lang, target_lang)
+    translated = _translation_memo.get(key)
+    if translated is None:
+        translated = _get_translator().translate(chunk, src=source_lang, dest=target_lang).text
+        _translation_memo.put(key, translated)
+        TRANSLATION_CHUNKS.labels('api').inc()
+    else:
+        TRANSLATION_CHUNKS.labels('memo').inc()
+    return translated
+
+def _translate_chunks(chunks, target_lang):
+    """Translate (chunk, source language) pairs and return {pair: translation}.
+
+    Each distinct pair is translated once, concurrently; map keeps the order.
+    """
+    unique_chunks = list(dict.fromkeys(item for item in chunks if item[0].strip()))
+    CHARACTERS.labels('translated').inc(sum(len(chunk) for chunk, _ in unique_chunks))
+    if len(unique_chunks) > 1 and TRANSLATION_WORKERS > 1:
+        results = _get_translation_executor().map(
+            _translate_chunk,
+            [chunk for chunk, _ in unique_chunks],
+            [source for _, source in unique_chunks],
+            [target_lang] * len(unique_chunks)
+        )
+    else:
+        results = (_translate_chunk(chunk, source, target_lang) for chunk, source in unique_chunks)
+    return dict(zip(unique_chunks, results))
+
+@stage_timer('translate')
 def translate_text(text, source_lang, target_lang):
-    """Translate text to target language"""
+    """Translate text to target language.
+
+    Returns the text and whether it was translated, or None instead of False
+    when translation failed and the original text is returned.
+    """
     if not text or source_lang == target_lang:
         return text, False
     
     try:
         # Translate text in chunks to avoid API limits
-        max_chunk_size = 1000
-        chunks = split_into_chunks(text, max_chunk_size)
-        translated_chunks = []
-        
-        for chunk in chunks:
-            if chunk.strip():
-                translation = translator.translate(chunk, src=source_lang, dest=target_lang)
-                translated_chunks.append(translation.text)
-            else:
-                translated_chunks.append(chunk)
-        
+        chunks = split_into_chunks(text, TRANSLATION_CHUNK_CHARS)
+        translations = _translate_chunks([(chunk, source_lang) for chunk in chunks], target_lang)
+
+        translated_chunks = [translations.get((chunk, source_lang), chunk) for chunk in chunks]
         return ' '.join(translated_chunks), True
     except Exception as e:
         traceback.print_exc()
-        return text, False  # Return original on error
+        return text, None  # Return original on error
+
+@stage_timer('translate')
+def translate_pages(text, page_languages, target_lang):
+    """Translate only the pages that are not in target_lang, each from its own language.
+
+    page_languages is the list from detect_page_languages. Page headers are
+    kept. Returns the text and whether any page was translated, or None
+    when translation failed, like translate_text.
+    """
+    languages = {entry["page"]: entry["code"] for entry in page_languages}
+    try:
+        pages = []
+        for number, page_text in split_pages(text):
+            source_lang = languages.get(number, target_lang)
+            chunks = split_into_chunks(page_text, TRANSLATION_CHUNK_CHARS) if source_lang != target_lang else None
+            pages.append((number, page_text, source_lang, chunks))
+
+        # Chunks of every page go to the translation pool together
+        translations = _translate_chunks(
+            [(chunk, source_lang) for _, _, source_lang, chunks in pages if chunks for chunk in chunks],
+            target_lang
+        )
+        if not translations:
+            return text, False
+
+        return join_pages(
+            (number, ' '.join(translations.get((chunk, source_lang), chunk) for chunk in chunks) if chunks else page_text)
+            for number, page_text, source_lang, chunks in pages
+        ), True
+    except Exception as e:
+        traceback.print_exc()
+        return text, None  # Return original on error
 
 def split_into_chunks(text, max_length):
     """Split text into chunks of specified maximum length at sentence boundaries"""
@@ -80,80 +296,443 @@ def split_into_chunks(text, max_length):
     
     return chunks
 
-def extract_text_from_image(file_path):
+def _is_in_memory(source):
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+def _open_source(source):
+    """Return a path or file object for PIL and PyPDF2: the path itself, or a buffer over the bytes"""
+    return io.BytesIO(source) if _is_in_memory(source) else source
+
+def _get_spill_spool():
+    global _spill_spool
+    if _spill_spool is None:
+        from utils.upload_spool import UploadSpool
+        _spill_spool = UploadSpool(
+            UPLOAD_SPOOL_DIR,
+            ttl_seconds=UPLOAD_SPOOL_TTL_SECONDS,
+            max_bytes=UPLOAD_SPOOL_MAX_BYTES,
+            sweep_interval=UPLOAD_SPOOL_SWEEP_SECONDS
+        )
+    return _spill_spool
+
+@contextmanager
+def _source_path(source, ext):
+    """Yield a file path for tools that only read files, spooling in-memory bytes for the block"""
+    if not _is_in_memory(source):
+        yield source
+        return
+    spool = _get_spill_spool()
+    with stage_timer('spill'):
+        path = spool.save(source, ext)
+    try:
+        yield path
+    finally:
+        spool.release(path)
+
+def extract_text_from_image(source):
+    """OCR an image given a file path, its bytes or an already decoded PIL image"""
+    from PIL import Image
     try:
-        image = Image.open(file_path)
-        return pytesseract.image_to_string(image)
+        image = source if isinstance(source, Image.Image) else Image.open(_open_source(source))
+        if not IMAGE_PREPROCESS:
+            return _ocr_page_image(image)
+
+        from utils.image_preprocessing import preprocess_for_ocr
+        with stage_timer('preprocess'):
+            image = preprocess_for_ocr(image, IMAGE_OCR_DPI, IMAGE_BINARIZE)
+        return _ocr_page_image(image, dpi=image.info['dpi'][0])
     except Exception as e:
         traceback.print_exc()
         return f"Error processing image: {str(e)}"
 
-def extract_text_from_pdf(file_path):
+@stage_timer('ocr')
+def _ocr_page_image(image, dpi=None):
+    return image_to_string(image, dpi=dpi)
+
+def _get_ocr_executor(workers):
+    # Request, stream and batch threads all get here
+    with _ocr_executors_lock:
+        executor = _ocr_executors.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _ocr_executors[workers] = executor
+        return executor
+
+def _discard_ocr_executor(workers, executor):
+    """Drop a pool whose worker died (e.g. OOM) so that the next document gets a fresh one"""
+    with _ocr_executors_lock:
+        if _ocr_executors.get(workers) is executor:
+            del _ocr_executors[workers]
+    executor.shutdown(wait=False)
+
+def init_extraction_worker():
+    """Initializer for process pools that extract whole documents (jobs, ASGI uploads).
+
+    Their workers OCR serially instead of each starting an OCR pool of
+    OCR_WORKERS processes, so the pool's own size bounds the Tesseract
+    processes it runs.
+    """
+    global _default_ocr_workers
+    _default_ocr_workers = 1
+
+def has_meaningful_text(text):
+    """Check whether a page's text layer has enough real characters to skip OCR"""
+    return sum(ch.isalnum() for ch in text or '') >= PDF_TEXT_MIN_CHARS
+
+def _ocr_pdf_window(file_path, first_page, last_page, dpi):
+    """Rasterise a short run of PDF pages, OCR them and free the images.
+
+    Returns one entry per page, None where rasterising or OCR failed.
+    """
+    from pdf2image import convert_from_path
+
+    count = last_page - first_page + 1
     try:
-        # First attempt to use PyPDF2 (pure Python library) instead of pdf2image
-        import PyPDF2
-        
-        text = ""
-        try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                num_pages = len(reader.pages)
-                
-                for i in range(num_pages):
-                    page = reader.pages[i]
-                    text += f"\n--- Page {i+1} ---\n"
-                    text += page.extract_text() or "[No text extracted]"
-                
-                if text.strip():
-                    return text
-                else:
-                    # If no text was extracted, fall back to file info
-                    raise Exception("No text content found in PDF")
-        except Exception as e:
-            # Continue to fallback method
-            pass
-            
-        # If PyPDF2 fails, try convert_from_path as a fallback
+        with stage_timer('rasterize'):
+            images = convert_from_path(file_path, dpi=dpi, first_page=first_page, last_page=last_page)
+    except Exception:
+        traceback.print_exc()
+        return [None] * count
+
+    texts = []
+    while images:
+        image = images.pop(0)
         try:
-            images = convert_from_path(file_path)
-            text = ''
-            for i, img in enumerate(images):
-                text += f"\n--- Page {i+1} ---\n"
-                text += pytesseract.image_to_string(img)
-            return text
-        except Exception as e:
-            # Continue to final fallback
-            pass
-            
+            texts.append(_ocr_page_image(image))
+        except Exception:
+            traceback.print_exc()
+            texts.append(None)
+        finally:
+            image.close()
+
+    return (texts + [None] * count)[:count]
+
+def _page_windows(page_numbers, window):
+    """Group page numbers into runs of at most `window` consecutive pages"""
+    windows = []
+    for number in sorted(set(page_numbers)):
+        if windows and number == windows[-1][1] + 1 and number - windows[-1][0] < window:
+            windows[-1][1] = number
+        else:
+            windows.append([number, number])
+    return [tuple(w) for w in windows]
+
+def ocr_pdf_pages(file_path, page_numbers, workers=None, dpi=None, window=None, progress=None):
+    """OCR the given PDF pages and return their text in the same order.
+
+    Pages are rasterised a window at a time inside the workers, so the
+    document's peak memory stays at roughly workers x window page images at
+    the given DPI however long it is. Documents OCRed at the same time in
+    one process share the pool. progress gets a 'page_ocr_done' stage as
+    each page's text arrives.
+    """
+    workers = _default_ocr_workers if workers is None else workers
+    dpi = dpi or PDF_RASTER_DPI
+    windows = _page_windows(page_numbers, max(1, window or PDF_RASTER_WINDOW))
+
+    executor = None
+    if workers <= 1 or len(windows) <= 1:
+        results = (_ocr_pdf_window(file_path, first, last, dpi) for first, last in windows)
+    else:
+        executor = _get_ocr_executor(workers)
+
+    texts_by_page = {}
+    try:
+        if executor is not None:
+            results = executor.map(
+                _ocr_pdf_window,
+                [file_path] * len(windows),
+                [first for first, _ in windows],
+                [last for _, last in windows],
+                [dpi] * len(windows)
+            )
+        for (first, last), texts in zip(windows, results):
+            for number, text in zip(range(first, last + 1), texts):
+                texts_by_page[number] = text
+                _report(progress, 'page_ocr_done', page=number, chars=len(text or ''))
+    except BrokenProcessPool:
+        _discard_ocr_executor(workers, executor)
+        raise
+    return [texts_by_page.get(number) for number in page_numbers]
+
+def extract_pdf_pages(source, progress=None):
+    """Extract each page from the PDF text layer, OCRing only pages without one.
+
+    source is the path of the PDF or its bytes. The text layer is read from
+    memory; bytes are written to the spool only if some pages need OCR,
+    since poppler rasterises from a file.
+
+    Returns a list of {"page", "method", "text"} dicts where method is
+    'text_layer', 'ocr' or 'none'.
+    """
+    import PyPDF2
+
+    pages = []
+    try:
+        with stage_timer('pdf_text_layer'):
+            reader = PyPDF2.PdfReader(_open_source(source))
+            for i, page in enumerate(reader.pages):
+                try:
+                    layer_text = page.extract_text() or ""
+                except Exception:
+                    traceback.print_exc()
+                    layer_text = ""
+                pages.append({"page": i + 1, "method": "text_layer", "text": layer_text})
+    except Exception:
+        # The text layer is unreadable, so every page has to be OCRed
+        traceback.print_exc()
+        from pdf2image import pdfinfo_from_path
+        with _source_path(source, '.pdf') as file_path:
+            num_pages = pdfinfo_from_path(file_path)["Pages"]
+        pages = [{"page": i + 1, "method": "text_layer", "text": ""} for i in range(num_pages)]
+
+    # Rasterise and OCR only the pages whose text layer is missing or too thin
+    needs_ocr = [page for page in pages if not has_meaningful_text(page["text"])]
+    _report(progress, 'text_layer_read', pages=len(pages), ocr_pages=len(needs_ocr))
+    if needs_ocr:
+        with _source_path(source, '.pdf') as file_path:
+            ocr_texts = ocr_pdf_pages(file_path, [page["page"] for page in needs_ocr], progress=progress)
+        for page, ocr_text in zip(needs_ocr, ocr_texts):
+            if ocr_text and ocr_text.strip():
+                page["method"] = "ocr"
+                page["text"] = ocr_text
+
+    for page in pages:
+        if not page["text"].strip():
+            page["method"] = "none"
+
+    return pages
+
+def page_report(pages):
+    """Summarise which extraction method was used for each page"""
+    return [
+        {"page": page["page"], "method": page["method"], "chars": len(page["text"])}
+        for page in pages
+    ]
+
+def _describe_source(source):
+    """Return (filename, size in bytes) of a PDF given as a path or as bytes"""
+    if _is_in_memory(source):
+        return "upload.pdf", len(source)
+    return os.path.basename(source), os.path.getsize(source)
+
+def extract_pdf_with_report(source, progress=None):
+    """Extract text from a PDF path or bytes and report the extraction method used per page"""
+    try:
+        pages = extract_pdf_pages(source, progress)
+        if any(page["method"] != "none" for page in pages):
+            text = ""
+            for page in pages:
+                text += PAGE_HEADER.format(page['page'])
+                text += page["text"] or "[No text extracted]"
+            return text, page_report(pages)
+
         # Final fallback - just return file info
-        filesize = os.path.getsize(file_path)
-        filename = os.path.basename(file_path)
-        return f"PDF document: {filename} (Size: {filesize} bytes). Unable to extract text due to library issues."
+        filename, filesize = _describe_source(source)
+        return f"PDF document: {filename} (Size: {filesize} bytes). Unable to extract text due to library issues.", page_report(pages)
     except Exception as e:
         traceback.print_exc()
         
         # Final fallback - try to at least return the file info
         try:
-            filesize = os.path.getsize(file_path)
-            filename = os.path.basename(file_path)
-            return f"PDF document: {filename} (Size: {filesize} bytes). Unable to extract text: {str(e)}"
+            filename, filesize = _describe_source(source)
+            return f"PDF document: {filename} (Size: {filesize} bytes). Unable to extract text: {str(e)}", []
         except:
-            return f"Error processing PDF: {str(e)}"
+            return f"Error processing PDF: {str(e)}", []
+
+def extract_text_from_pdf(file_path):
+    text, _ = extract_pdf_with_report(file_path)
+    return text
+
+def extract_text_from_file(source, ext, progress=None):
+    """Extract text from an upload based on its file extension.
+
+    source is the path of the saved upload or its bytes; bytes are read from
+    memory, without a round trip through the disk where the tools allow it.
+    Returns the text and a per-page report of the extraction method used.
+    progress, if given, is called as progress(stage, data) after each page.
+    """
+    with stage_timer('extract'):
+        text, pages = _extract_by_type(source, ext, progress)
+    for page in pages:
+        PAGES.labels(page["method"]).inc()
+    CHARACTERS.labels('extracted').inc(len(text))
+    return text, pages
+
+# Text returned in place of a document's text when extraction failed: error
+# messages and the file-info fallback of extract_pdf_with_report
+EXTRACTION_FAILURE_PREFIXES = ("Error processing", "Error converting", "PDF document: ")
+
+def extraction_failed(text, pages):
+    """Whether extract_text_from_file produced a failure message or no page with text.
+
+    Pages are reported with method 'none' when they have no text and, for
+    images, 'error' when OCR failed.
+    """
+    if text.startswith(EXTRACTION_FAILURE_PREFIXES):
+        return True
+    return all(page["method"] in ("none", "error") for page in pages)
 
-def handle_heic(file_path):
+def _extract_by_type(source, ext, progress=None):
+    if ext == '.pdf':
+        return extract_pdf_with_report(source, progress)
+    elif ext == '.heic':
+        image = handle_heic(source)
+        if image is None:
+            return "Error converting HEIC file.", []
+        text = extract_text_from_image(image)
+        _report(progress, 'page_ocr_done', page=1, chars=len(text))
+        return text, _image_page_report(text)
+    elif ext in ['.jpg', '.jpeg', '.png', '.tiff']:
+        text = extract_text_from_image(source)
+        _report(progress, 'page_ocr_done', page=1, chars=len(text))
+        return text, _image_page_report(text)
+    raise ValueError(f"Unsupported file type: {ext}")
+
+def _image_page_report(text):
+    """Page report of an OCRed image: method 'error' if OCR failed, 'none' if it found no text"""
+    if text.startswith(EXTRACTION_FAILURE_PREFIXES):
+        return [{"page": 1, "method": "error", "chars": 0}]
+    return [{"page": 1, "method": "ocr" if text.strip() else "none", "chars": len(text)}]
+
+@stage_timer('heic_decode')
+def handle_heic(source):
+    """Decode a HEIC file (path or bytes) in-process and return it as a PIL image"""
+    global _heif_opener_registered
+    from PIL import Image
     try:
-        temp_path = file_path.replace(".heic", ".jpg")
-        os.system(f'sips -s format jpeg "{file_path}" --out "{temp_path}"')
-        return temp_path
+        if not _heif_opener_registered:
+            from pillow_heif import register_heif_opener
+            register_heif_opener()
+            _heif_opener_registered = True
+        image = Image.open(_open_source(source))
+        image.load()
+        return image
     except Exception as e:
         traceback.print_exc()
         return None
 
-def process_text_with_gemini(text):
+# Language variants a client can ask for, by the names used in the response
+LANGUAGE_VARIANTS = ['original', 'english', 'german']
+LANGUAGE_ALIASES = {
+    'original': 'original',
+    'en': 'english',
+    'english': 'english',
+    'de': 'german',
+    'german': 'german'
+}
+
+def parse_languages(value):
+    """Parse a comma-separated languages parameter such as 'en' or 'en,de'.
+
+    Returns None when no value is given, meaning every variant. Raises
+    ValueError for unknown languages.
+    """
+    if not value:
+        return None
+    languages = set()
+    for token in value.split(','):
+        token = token.strip().lower()
+        if not token:
+            continue
+        if token not in LANGUAGE_ALIASES:
+            raise ValueError(f"Unsupported language: {token}")
+        languages.add(LANGUAGE_ALIASES[token])
+    return languages or None
+
+def _translation_result(response, was_translated):
+    """Flag response if a translation failed; returns whether the text was translated.
+
+    Responses with translation_failed are neither cached nor saved, so the
+    next upload of the document tries again.
+    """
+    if was_translated is None:
+        response["translation_failed"] = True
+    return bool(was_translated)
+
+def missing_language_variants(response, languages=None):
+    """List the requested variants that a processed response does not have yet"""
+    wanted = LANGUAGE_VARIANTS if languages is None else [l for l in LANGUAGE_VARIANTS if l in languages]
+    return [
+        variant for variant in wanted
+        if variant not in response.get("translations", {}) or variant not in response.get("summaries", {})
+    ]
+
+def add_language_variants(response, languages=None, progress=None):
+    """Fill in missing translations and summaries of a processed response.
+
+    Works from the stored English text and summary, so the document is not
+    re-extracted. Returns True if anything was added.
+    """
+    missing = missing_language_variants(response, languages)
+    if not missing or "error" in response:
+        return False
+
+    original_language = response["original_language"]["code"]
+    translations = response["translations"]
+    summaries = response["summaries"]
+    english_summary = summaries["english"]
+
+    if "original" in missing:
+        # Translate the English summary back to original language
+        if original_language != 'en':
+            original_summary, was_translated = translate_text(english_summary, 'en', original_language)
+            _translation_result(response, was_translated)
+            summaries["original"] = original_summary
+        else:
+            summaries["original"] = english_summary
+        _report(progress, 'summary_ready', language='original')
+
+    if "german" in missing:
+        # Translate to German
+        if response.get("page_languages"):
+            german_text, was_translated = translate_pages(
+                translations["original"]["text"], response["page_languages"], 'de'
+            )
+        else:
+            german_text, was_translated = translate_text(
+                translations["english"]["text"] if original_language != 'de' else translations["original"]["text"],
+                'en' if original_language != 'de' else original_language,
+                'de'
+            )
+        translations["german"] = {
+            "code": "de",
+            "name": "German",
+            "text": german_text,
+            "translated": _translation_result(response, was_translated)
+        }
+        _report(progress, 'translation_done', language='german', translated=translations["german"]["translated"])
+
+        # German summary
+        german_summary, was_translated = translate_text(english_summary, 'en', 'de')
+        _translation_result(response, was_translated)
+        summaries["german"] = german_summary
+        _report(progress, 'summary_ready', language='german')
+
+    response["languages"] = [l for l in LANGUAGE_VARIANTS if l in summaries]
+    return True
+
+@stage_timer('process_text')
+def process_text_with_gemini(text, languages=None, progress=None):
+    """Detect the language, translate and summarize the extracted text.
+
+    English is always produced because classification and summaries work on
+    it. Other variants are only built when listed in languages (None means
+    all of them) and can be added later with add_language_variants.
+    """
     try:
-        # Detect the original language
-        original_language = detect_language(text)
+        # Detect the original language, optionally page by page so that only
+        # the pages of a mixed-language record that need it are translated
+        page_languages = None
+        if DETECT_LANGUAGE_PER_PAGE and len(split_pages(text)) > 1:
+            original_language, page_languages = detect_page_languages(text)
+        else:
+            original_language = detect_language(text)
         original_language_name = get_language_name(original_language)
+        _report(progress, 'language_detected', code=original_language, name=original_language_name)
         
         # Store the original text
         original_text = text
@@ -168,68 +747,53 @@ def process_text_with_gemini(text):
         }
         
         # Translate to English if not already in English
-        if original_language != 'en':
+        if page_languages:
+            english_text, was_translated = translate_pages(original_text, page_languages, 'en')
+        elif original_language != 'en':
             english_text, was_translated = translate_text(original_text, original_language, 'en')
-            translations["english"] = {
-                "code": "en",
-                "name": "English",
-                "text": english_text,
-                "translated": was_translated
-            }
         else:
             # If already English, just copy
-            translations["english"] = {
-                "code": "en",
-                "name": "English",
-                "text": original_text,
-                "translated": False
-            }
-        
-        # Translate to German
-        german_text, was_translated = translate_text(
-            translations["english"]["text"] if original_language != 'de' else original_text,
-            'en' if original_language != 'de' else original_language,
-            'de'
-        )
-        translations["german"] = {
-            "code": "de",
-            "name": "German",
-            "text": german_text,
-            "translated": was_translated
+            english_text, was_translated = original_text, False
+        english_translated = was_translated
+        translations["english"] = {
+            "code": "en",
+            "name": "English",
+            "text": english_text,
+            "translated": bool(was_translated)
         }
+        _report(progress, 'translation_done', language='english',
+                translated=translations["english"]["translated"])
         
         # Use English for processing and generating the summary
-        document_type = get_document_type(translations["english"]["text"])
-        
-        # Generate medical summaries in each language
-        summaries = {}
+        from utils.document_classifier import classify_document
+        with stage_timer('classify'):
+            classification = classify_document(translations["english"]["text"])
+        document_type = classification.label
+        _report(progress, 'classified', document_type=document_type, confidence=classification.confidence)
         
         # English summary (base summary)
         english_summary = generate_medical_summary(translations["english"]["text"], document_type)
-        summaries["english"] = english_summary
-        
-        # Original language summary (if not English)
-        if original_language != 'en':
-            # Translate the English summary back to original language
-            original_summary, _ = translate_text(english_summary, 'en', original_language)
-            summaries["original"] = original_summary
-        else:
-            summaries["original"] = english_summary
-        
-        # German summary
-        german_summary, _ = translate_text(english_summary, 'en', 'de')
-        summaries["german"] = german_summary
+        summaries = {"english": english_summary}
+        _report(progress, 'summary_ready', language='english')
         
-        # Create the final structured response with all languages
+        # Create the final structured response
         response = {
             "document_type": document_type,
+            "document_type_confidence": classification.confidence,
             "original_language": {
                 "code": original_language,
                 "name": original_language_name
             },
             "translations": translations,
-            "summaries": summaries
+            "summaries": summaries,
+            "languages": ["english"]
         }
+        if page_languages:
+            response["page_languages"] = page_languages
+        _translation_result(response, english_translated)
+
+        # Generate the other requested language versions
+        add_language_variants(response, languages, progress)
         
         return response
     except Exception as e:
@@ -240,124 +804,113 @@ def process_text_with_gemini(text):
             "document_type": "Unknown"
         }
 
+@stage_timer('summarize')
 def generate_medical_summary(text, document_type):
     """Generate a concise, clinically-relevant summary of the medical document"""
     
+    # Dates, values, medications and identifiers come from a single scan of
+    # the text; clinical notes and imaging reports are summarized by section
+    with stage_timer('extract_entities'):
+        entities = extract_entities(text)
+
     # Create different summary templates based on document type
     if document_type == "Laboratory Report":
-        return summarize_lab_report(text)
+        return summarize_lab_report(text, entities)
     elif document_type == "Prescription or Medication Instructions":
-        return summarize_prescription(text)
+        return summarize_prescription(text, entities)
     elif document_type == "Clinical Note or Assessment":
         return summarize_clinical_note(text)
     elif document_type == "Imaging Report":
         return summarize_imaging_report(text)
     elif document_type == "Insurance Document":
-        return summarize_insurance_document(text)
+        return summarize_insurance_document(text, entities)
     else:
-        return summarize_general_medical_document(text)
+        return summarize_general_medical_document(text, entities)
 
-def extract_numeric_values(text):
+def extract_numeric_values(text, entities=None):
     """Extract numeric values with their units and potential labels"""
-    # Pattern for numeric values with units (e.g., 120 mg/dL, 78 bpm)
-    pattern = r'(\d+\.?\d*)\s*([a-zA-Z/%]+)'
-    matches = re.findall(pattern, text)
-    
-    # Extract numbers with potential labels (e.g., Glucose: 120)
-    label_pattern = r'([A-Za-z\s]+):\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)'
-    labeled_matches = re.findall(label_pattern, text)
-    
-    results = []
-    # Process numeric values with units
-    for value, unit in matches:
-        results.append(f"{value} {unit}")
-    
-    # Process labeled values
-    for label, value, unit in labeled_matches:
-        if label.strip() and value:
-            results.append(f"{label.strip()}: {value} {unit}".strip())
-    
+    if entities is None:
+        entities = extract_entities(text)
+
+    # Numeric values with units (e.g., 120 mg/dL, 78 bpm), then labelled ones (e.g., Glucose: 120)
+    results = entities.values('quantity')
+    results += [entity.value for entity in entities.of('labeled_value') if entity.attrs["label"]]
     return results
 
-def extract_dates(text):
+def extract_dates(text, entities=None):
     """Extract dates from the text"""
-    # Various date formats
-    date_patterns = [
-        r'\d{1,2}/\d{1,2}/\d{2,4}',  # MM/DD/YYYY or DD/MM/YYYY
-        r'\d{1,2}-\d{1,2}-\d{2,4}',  # MM-DD-YYYY or DD-MM-YYYY
-        r'[A-Za-z]{3,9}\s+\d{1,2},?\s+\d{4}',  # Month DD, YYYY
-        r'\d{1,2}\s+[A-Za-z]{3,9},?\s+\d{4}'   # DD Month YYYY
-    ]
-    
-    dates = []
-    for pattern in date_patterns:
-        matches = re.findall(pattern, text)
-        dates.extend(matches)
-    
-    return dates
+    if entities is None:
+        entities = extract_entities(text)
+    return entities.values('date')
 
-def extract_medications(text):
+def extract_medications(text, entities=None):
     """Extract medication names and dosages"""
-    # Common medication suffixes and dosage patterns
-    med_patterns = [
-        r'([A-Za-z]+(?:cillin|mycin|oxacin|oxin|zepam|statin|sartan|pril|ide|olol|parin|ine|one|zole|mab))\s+(\d+\.?\d*\s*(?:mg|mcg|g|ml|%|mg/ml|mg/g|IU))',
-        r'([A-Za-z]+(?:-[A-Za-z]+)?)\s+(\d+\.?\d*\s*(?:mg|mcg|g|ml|%|mg/ml|mg/g|IU))'
-    ]
-    
-    medications = []
-    for pattern in med_patterns:
-        matches = re.findall(pattern, text)
-        for med, dose in matches:
-            medications.append(f"{med} {dose}")
-    
-    # Look for specific instructions
-    instructions = re.findall(r'Take\s+(.+?)(?:\.|\n)', text)
-    
-    return medications, instructions
+    if entities is None:
+        entities = extract_entities(text)
+    return entities.values('medication'), entities.values('instruction')
+
+def extract_lab_results(text, entities=None):
+    """Return (test name, value, unit, reference range or None) for each lab value.
+
+    Values are labelled ones ("Glucose: 92 mg/dL") and quantities that
+    follow a test name of letters and digits on their line ("HbA1c 6.1 %").
+    A reference range
+    belongs to the value before it on the same line.
+    """
+    if entities is None:
+        entities = extract_entities(text)
+
+    results = []
+    result_end = None
+    previous_end = 0
+    for entity in entities.entities:
+        if entity.kind == 'reference_range':
+            if results and results[-1][3] is None and '\n' not in text[result_end:entity.start]:
+                results[-1] = results[-1][:3] + (entity.value.strip(),)
+        elif entity.kind == 'labeled_value':
+            results.append((entity.attrs["label"], entity.attrs["number"], entity.attrs["unit"], None))
+            result_end = entity.end
+        elif entity.kind == 'quantity':
+            # The test name is whatever precedes the value on its line, after the previous entity
+            line_start = text.rfind('\n', 0, entity.start) + 1
+            name = text[max(line_start, previous_end):entity.start].strip().rstrip(':').strip()
+            if name and name[0].isalpha() and name.replace(' ', '').isalnum():
+                results.append((name, entity.attrs["number"], entity.attrs["unit"], None))
+                result_end = entity.end
+        previous_end = max(previous_end, entity.end)
+    return results
 
-def summarize_lab_report(text):
+def summarize_lab_report(text, entities=None):
     """Extract and summarize key information from a lab report"""
+    if entities is None:
+        entities = extract_entities(text)
     summary = ""
-    
-    # Extract test names, values, and reference ranges
-    test_patterns = [
-        r'([A-Za-z\s]+):\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)\s*(?:\(Reference:?\s*(\d+\.?\d*\s*-\s*\d+\.?\d*\s*[a-zA-Z/%]*)\))?',
-        r'([A-Za-z\s]+)\s*(\d+\.?\d*)\s*([a-zA-Z/%]*)\s*(?:Reference Range:?\s*(\d+\.?\d*\s*-\s*\d+\.?\d*\s*[a-zA-Z/%]*))?'
-    ]
-    
+
     abnormal_results = []
     normal_results = []
-    
-    for pattern in test_patterns:
-        matches = re.findall(pattern, text)
-        for match in matches:
-            test_name, value, unit, reference = match
-            test_name = test_name.strip()
-            if test_name and value:
-                result = f"{test_name}: {value} {unit}"
-                
-                # Try to determine if abnormal
-                if reference:
-                    if '-' in reference:
-                        try:
-                            ref_range = reference.split('-')
-                            low = float(ref_range[0].strip().split()[0])
-                            high = float(ref_range[1].strip().split()[0])
-                            value_num = float(value)
-                            
-                            if value_num < low or value_num > high:
-                                abnormal_results.append(f"{result} (Abnormal, ref: {reference})")
-                            else:
-                                normal_results.append(result)
-                        except:
-                            normal_results.append(result)
-                    else:
-                        normal_results.append(result)
+
+    for test_name, value, unit, reference in extract_lab_results(text, entities):
+        result = f"{test_name}: {value} {unit}".strip()
+
+        # Try to determine if abnormal
+        if reference:
+            try:
+                ref_range = reference.split('-')
+                low = float(ref_range[0].strip().split()[0])
+                high = float(ref_range[1].strip().split()[0])
+                value_num = float(value)
+
+                if value_num < low or value_num > high:
+                    abnormal_results.append(f"{result} (Abnormal, ref: {reference})")
                 else:
                     normal_results.append(result)
-    
+            except (ValueError, IndexError):
+                normal_results.append(result)
+        else:
+            normal_results.append(result)
+
     # Extract dates
-    dates = extract_dates(text)
+    dates = extract_dates(text, entities)
     collection_date = dates[0] if dates else "Unknown date"
     
     # Build the summary
@@ -378,25 +931,23 @@ def summarize_lab_report(text):
     
     return summary
 
-def summarize_prescription(text):
+def summarize_prescription(text, entities=None):
     """Extract and summarize key information from a prescription"""
-    medications, instructions = extract_medications(text)
+    if entities is None:
+        entities = extract_entities(text)
+    medications, instructions = extract_medications(text, entities)
     
     # Extract patient information
-    patient_name = re.search(r'(?:Name|Patient):\s*([A-Za-z\s]+)', text)
-    patient_name = patient_name.group(1).strip() if patient_name else "Unknown patient"
+    patient_name = entities.first('patient_name', "Unknown patient")
     
     # Extract doctor information
-    doctor = re.search(r'(?:Dr\.|Doctor|Physician)[\s:]*((?:[A-Za-z]+\s*)+)', text)
-    doctor = doctor.group(1).strip() if doctor else "Unknown doctor"
+    doctor = entities.first('doctor', "Unknown doctor")
     
     # Extract dates
-    dates = extract_dates(text)
-    prescription_date = dates[0] if dates else "Unknown date"
+    prescription_date = entities.first('date', "Unknown date")
     
     # Extract any refill information
-    refills = re.search(r'Refills?:\s*(\d+|zero|none)', text, re.IGNORECASE)
-    refills = refills.group(1) if refills else "Not specified"
+    refills = entities.first('refills', "Not specified")
     
     # Build the summary
     summary = f"Patient: {patient_name}\n"
@@ -424,10 +975,11 @@ def summarize_prescription(text):
 def summarize_clinical_note(text):
     """Extract and summarize key information from a clinical note"""
     # Extract sections
-    chief_complaint = extract_section(text, ['chief complaint', 'presenting complaint', 'reason for visit'], 200)
-    history = extract_section(text, ['history', 'history of present illness', 'past medical history'], 300)
-    assessment = extract_section(text, ['assessment', 'impression', 'diagnosis'], 300)
-    plan = extract_section(text, ['plan', 'recommendation', 'treatment'], 300)
+    sections = SectionIndex(text)
+    chief_complaint = sections.get(['chief complaint', 'presenting complaint', 'reason for visit'], 200)
+    history = sections.get(['history', 'history of present illness', 'past medical history'], 300)
+    assessment = sections.get(['assessment', 'impression', 'diagnosis'], 300)
+    plan = sections.get(['plan', 'recommendation', 'treatment'], 300)
     
     # Extract vital signs
     vitals = []
@@ -487,9 +1039,10 @@ def summarize_clinical_note(text):
 def summarize_imaging_report(text):
     """Extract and summarize key information from an imaging report"""
     # Extract sections
-    exam_type = extract_section(text, ['exam', 'examination', 'procedure', 'study', 'scan'], 100)
-    findings = extract_section(text, ['findings', 'result', 'observation'], 500)
-    impression = extract_section(text, ['impression', 'conclusion', 'assessment', 'summary'], 300)
+    sections = SectionIndex(text)
+    exam_type = sections.get(['exam', 'examination', 'procedure', 'study', 'scan'], 100)
+    findings = sections.get(['findings', 'result', 'observation'], 500)
+    impression = sections.get(['impression', 'conclusion', 'assessment', 'summary'], 300)
     
     # Build the summary
     summary = ""
@@ -519,19 +1072,22 @@ def summarize_imaging_report(text):
     
     return summary
 
-def summarize_insurance_document(text):
+def summarize_insurance_document(text, entities=None):
     """Extract and summarize key information from an insurance document"""
+    if entities is None:
+        entities = extract_entities(text)
+
     # Extract policy details
-    policy_number = extract_first_match(text, [r'Policy\s*(?:#|Number|No\.?):\s*([A-Za-z0-9-]+)', r'Policy\s*ID:\s*([A-Za-z0-9-]+)'])
-    member_id = extract_first_match(text, [r'Member\s*(?:ID|Number|#):\s*([A-Za-z0-9-]+)', r'ID\s*Number:\s*([A-Za-z0-9-]+)'])
-    group_number = extract_first_match(text, [r'Group\s*(?:#|Number|No\.?):\s*([A-Za-z0-9-]+)'])
+    policy_number = entities.first('policy_number')
+    member_id = entities.first('member_id')
+    group_number = entities.first('group_number')
     
     # Extract coverage info
-    effective_date = extract_first_match(text, [r'Effective\s*Date:\s*([A-Za-z0-9/-]+)', r'Coverage\s*Begins:\s*([A-Za-z0-9/-]+)'])
-    expiration_date = extract_first_match(text, [r'Expiration\s*Date:\s*([A-Za-z0-9/-]+)', r'Coverage\s*Ends:\s*([A-Za-z0-9/-]+)', r'Expires:\s*([A-Za-z0-9/-]+)'])
+    effective_date = entities.first('effective_date')
+    expiration_date = entities.first('expiration_date')
     
-    # Extract provider/payer
-    provider = extract_first_match(text, [r'(?:Insurance|Provider|Carrier|Plan):\s*([A-Za-z\s]+)', r'([A-Za-z]+\s+(?:Insurance|Health|Life))'])
+    # Extract provider/payer, preferring an explicitly labelled one
+    provider = entities.first('provider') or entities.first('provider_name')
     
     # Build the summary
     summary = "INSURANCE DETAILS:\n"
@@ -563,14 +1119,16 @@ def summarize_insurance_document(text):
     
     return summary
 
-def summarize_general_medical_document(text):
+def summarize_general_medical_document(text, entities=None):
     """Extract and summarize key information from a general medical document"""
+    if entities is None:
+        entities = extract_entities(text)
+
     # Extract dates
-    dates = extract_dates(text)
-    document_date = dates[0] if dates else "Unknown date"
+    document_date = entities.first('date', "Unknown date")
     
     # Extract numeric values
-    values = extract_numeric_values(text)
+    values = extract_numeric_values(text, entities)
     
     # Extract potential diagnoses
     diagnosis_pattern = r'(?:diagnosis|assessment|impression|condition)(?:\s*:|.{0,10})(.*?)(?:\.|$)'
@@ -604,18 +1162,16 @@ def summarize_general_medical_document(text):
     
     return summary
 
-def extract_section(text, keywords, max_length=200):
-    """Extract a section from text based on keywords"""
-    for keyword in keywords:
-        pattern = fr'(?i){re.escape(keyword)}(?:\s*:|.{{0,10}})(.*?)(?:(?:{"|".join([re.escape(k) for k in keywords if k != keyword])})|$)'
-        matches = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-        if matches:
-            content = matches.group(1).strip()
-            # Limit length
-            if len(content) > max_length:
-                content = content[:max_length] + "..."
-            return content
-    return ""
+def extract_section(text, keywords, max_length=200, sections=None):
+    """Extract a section from text based on keywords.
+
+    Pass a SectionIndex built once for the text when looking up several
+    sections of the same document. Raises ValueError for keywords that are
+    not in SECTION_HEADINGS.
+    """
+    if sections is None:
+        sections = SectionIndex(text)
+    return sections.get(keywords, max_length)
 
 def extract_first_match(text, patterns):
     """Extract the first match from a list of patterns"""
@@ -657,20 +1213,8 @@ def get_language_name(language_code):
 
 def get_document_type(text):
     """Helper function to guess document type based on content"""
-    text_lower = text.lower()
-    
-    if any(term in text_lower for term in ['lab', 'test', 'result', 'blood', 'sample', 'reference range']):
-        return "Laboratory Report"
-    elif any(term in text_lower for term in ['prescription', 'rx', 'take', 'daily', 'dose', 'medication']):
-        return "Prescription or Medication Instructions"
-    elif any(term in text_lower for term in ['diagnosis', 'assessment', 'plan', 'history', 'examination']):
-        return "Clinical Note or Assessment"
-    elif any(term in text_lower for term in ['x-ray', 'mri', 'ct', 'scan', 'imaging', 'radiograph']):
-        return "Imaging Report"
-    elif any(term in text_lower for term in ['insurance', 'policy', 'coverage', 'claim']):
-        return "Insurance Document"
-    else:
-        return "Medical Document"
+    from utils.document_classifier import classify_document
+    return classify_document(text).label
 
 def format_document_response(response):
     """Format the response for better display in the frontend"""
@@ -710,17 +1254,9 @@ def main(file_path, doc_type, patient_id=None):
     try:
         ext = os.path.splitext(file_path)[-1].lower()
 
-        if ext == '.pdf':
-            text = extract_text_from_pdf(file_path)
-        elif ext == '.heic':
-            jpeg_path = handle_heic(file_path)
-            if jpeg_path:
-                text = extract_text_from_image(jpeg_path)
-                os.remove(jpeg_path)
-            else:
-                text = "Error converting HEIC file."
-        elif ext in ['.jpg', '.jpeg', '.png', '.tiff']:
-            text = extract_text_from_image(file_path)
+        pages = []
+        if ext in SUPPORTED_EXTENSIONS:
+            text, pages = extract_text_from_file(file_path, ext)
         else:
             text = f"Unsupported file type: {ext}"
 
@@ -733,6 +1269,7 @@ def main(file_path, doc_type, patient_id=None):
         # Return the processed data
         return {
             "extracted_text": text,
+            "pages": pages,
             "ai_response": ai_response,
             "formatted_response": formatted_response,
             "document_type": ai_response["document_type"],
@@ -744,7 +1281,11 @@ def main(file_path, doc_type, patient_id=None):
         return {"error": str(e)}
 
 if __name__ == "__main__":
-    file_path = '/Users/zoe/Desktop/lomazo/backend/test_data/MATRULLO_ZOE_20240925_5639.pdf'
+    # Process the file given on the command line, or the bundled sample PDF.
+    # benchmarks/run_benchmarks.py times the pipeline over all test data.
+    default_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'test_data', 'MATRULLO_ZOE_20240925_5639.pdf')
+    file_path = sys.argv[1] if len(sys.argv) > 1 else default_path
     doc_type = "lab_result"  # Example document type
     patient_id = 5           # Example patient ID
     result = main(file_path, doc_type, patient_id)
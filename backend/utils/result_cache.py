@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+
+def compute_content_hash(data):
+    """Return the SHA-256 hex digest of the uploaded file bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class LRUCache:
+    """Small thread-safe LRU map with an optional per-entry TTL"""
+
+    def __init__(self, max_entries, ttl_seconds=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResultCache:
+    """Two-tier cache for processed documents, keyed by content hash.
+
+    The first tier is an in-process LRU. The second tier is a SQLite file that
+    every gunicorn worker on the host reads and writes, so a document processed
+    by one worker is a hit for all of them. Entries are stored per pipeline
+    version; bumping the version makes older results unreachable.
+    """
+
+    def __init__(self, db_path, pipeline_version, memory_entries=128,
+                 ttl_seconds=7 * 24 * 3600, max_bytes=512 * 1024 * 1024):
+        self.db_path = db_path
+        self.pipeline_version = pipeline_version
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._memory = LRUCache(memory_entries, ttl_seconds)
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "errors": 0
+        }
+        self._schema_ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " content_hash TEXT NOT NULL,"
+                " pipeline_version TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (content_hash, pipeline_version))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed_at)")
+            self._schema_ready = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def get(self, content_hash):
+        """Return the cached result dict for this content hash, or None"""
+        payload = self._memory.get(content_hash)
+        if payload is not None:
+            self._count("memory_hits")
+            return json.loads(payload)
+
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT payload, created_at FROM results WHERE content_hash = ? AND pipeline_version = ?",
+                    (content_hash, self.pipeline_version)
+                ).fetchone()
+                now = time.time()
+                if row and row[1] + self.ttl_seconds < now:
+                    conn.execute(
+                        "DELETE FROM results WHERE content_hash = ? AND pipeline_version = ?",
+                        (content_hash, self.pipeline_version)
+                    )
+                    self._count("evictions")
+                    row = None
+                if row:
+                    conn.execute(
+                        "UPDATE results SET accessed_at = ? WHERE content_hash = ? AND pipeline_version = ?",
+                        (now, content_hash, self.pipeline_version)
+                    )
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            traceback.print_exc()
+            self._count("errors")
+            row = None
+
+        if not row:
+            self._count("misses")
+            return None
+
+        self._count("disk_hits")
+        self._memory.put(content_hash, row[0])
+        return json.loads(row[0])
+
+    def put(self, content_hash, result):
+        """Store a result dict in both tiers and evict anything over TTL or size"""
+        payload = json.dumps(result)
+        self._memory.put(content_hash, payload)
+        self._count("stores")
+
+        try:
+            conn = self._connect()
+            try:
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO results "
+                    "(content_hash, pipeline_version, payload, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (content_hash, self.pipeline_version, payload, len(payload), now, now)
+                )
+                self._evict(conn, now)
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            traceback.print_exc()
+            self._count("errors")
+
+    def _evict(self, conn, now):
+        # Drop expired entries first, then the least recently used until we fit
+        expired = conn.execute(
+            "DELETE FROM results WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        evicted = max(expired, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total > self.max_bytes:
+            rows = conn.execute(
+                "SELECT content_hash, pipeline_version, size FROM results ORDER BY accessed_at ASC"
+            ).fetchall()
+            for content_hash, version, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute(
+                    "DELETE FROM results WHERE content_hash = ? AND pipeline_version = ?",
+                    (content_hash, version)
+                )
+                self._memory.pop(content_hash)
+                total -= size
+                evicted += 1
+
+        if evicted:
+            self._count("evictions", evicted)
+
+    def stats(self):
+        """Return hit/miss counters for this process plus the shared tier size"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        stats["memory_entries"] = len(self._memory)
+        stats["pipeline_version"] = self.pipeline_version
+
+        try:
+            conn = self._connect()
+            try:
+                entries, size = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+                ).fetchone()
+            finally:
+                conn.close()
+            stats["disk_entries"] = entries
+            stats["disk_bytes"] = size
+        except sqlite3.Error:
+            traceback.print_exc()
+
+        return stats
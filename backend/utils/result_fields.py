@@ -0,0 +1,67 @@
+# Projection of upload result bodies with ?fields=, e.g.
+# ?fields=document_id,ai_response.summaries.english returns only those parts.
+# Without it the result is returned without the parts that repeat others.
+
+# Top-level fields of an upload result body
+RESULT_FIELDS = ['message', 'content_hash', 'cached', 'document_id', 'extracted_text', 'pages',
+                 'ai_response', 'structured_data']
+
+# Left out unless named in ?fields=: structured_data.summary is ai_response
+# again, and the original translation's text is extracted_text again
+DUPLICATE_FIELDS = ['structured_data', 'ai_response.translations.original.text']
+
+
+def parse_fields(value):
+    """Parse 'a,b.c' into a list of dotted paths; None when no projection was asked for"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    for field in fields:
+        if field.split('.')[0] not in RESULT_FIELDS:
+            raise ValueError(f"Unsupported field: {field}")
+    return fields or None
+
+
+def project_result(result, fields=None):
+    """Return the parts of a result body named by fields, or all but the duplicates.
+
+    The result is not modified; it may be shared with the result cache.
+    """
+    if fields is None:
+        for path in DUPLICATE_FIELDS:
+            result = _without(result, path.split('.'))
+        return result
+
+    projected = {}
+    for path in fields:
+        _copy_path(result, projected, path.split('.'))
+    return projected
+
+
+def _without(body, keys):
+    """Return body without the value at keys, copying only the dicts along the way"""
+    head, rest = keys[0], keys[1:]
+    if not isinstance(body, dict) or head not in body:
+        return body
+    body = dict(body)
+    if rest:
+        body[head] = _without(body[head], rest)
+    else:
+        del body[head]
+    return body
+
+
+def _copy_path(source, target, keys):
+    head, rest = keys[0], keys[1:]
+    if not isinstance(source, dict) or head not in source:
+        return
+    if not rest:
+        target[head] = source[head]
+        return
+    child = target.get(head)
+    if child is source[head]:
+        # The whole value was already asked for
+        return
+    if not isinstance(child, dict):
+        child = target[head] = {}
+    _copy_path(source[head], child, rest)
@@ -0,0 +1,125 @@
+import bisect
+import re
+
+# Every heading the summarizers look up, across all document types
+SECTION_HEADINGS = [
+    # Clinical notes
+    'chief complaint', 'presenting complaint', 'reason for visit',
+    'history', 'history of present illness', 'past medical history',
+    'assessment', 'impression', 'diagnosis',
+    'plan', 'recommendation', 'treatment',
+    # Imaging reports
+    'exam', 'examination', 'procedure', 'study', 'scan',
+    'findings', 'result', 'observation',
+    'conclusion', 'summary',
+    # Insurance documents
+    'coverage', 'benefits', 'covered', 'deductible', 'copay', 'co-pay',
+]
+
+# Shorter headings each heading starts with: a "History of Present Illness"
+# heading is matched whole, but is also the section a 'history' lookup wants
+_HEADING_PREFIXES = {
+    heading: [prefix for prefix in SECTION_HEADINGS if prefix != heading and heading.startswith(prefix)]
+    for heading in SECTION_HEADINGS
+}
+
+# Characters allowed before a heading on its line, e.g. "2. Plan" or "- Findings"
+_LINE_PREFIX_CHARS = ' \t-*#.)0123456789•'
+
+
+def _trie_pattern(words):
+    """Build a regex that matches any of the words by walking a shared-prefix trie.
+
+    "exam" and "examination" become exam(?:ination)?, so the scan tests each
+    prefix once instead of trying every heading at every position. Longer
+    headings win over their prefixes, as in Aho-Corasick leftmost-longest
+    matching.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if '' in node:
+            return f'(?:{pattern})?'
+        return pattern
+
+    return build(trie)
+
+
+# One case-insensitive scan finds every known heading; a trailing "s" is
+# allowed so that "Results" or "Recommendations" count as well
+HEADING_REGEX = re.compile(r'(?i)\b(?P<heading>' + _trie_pattern(SECTION_HEADINGS) + r')s?\b')
+
+
+class SectionIndex:
+    """Segments a document once into sections keyed by heading.
+
+    An occurrence counts as a heading when it starts its line or is followed
+    by a colon. Sections run from a heading to the next heading. Each
+    heading maps to its first section, which is also registered under the
+    shorter headings it starts with. A heading word that only appears
+    inline maps to the text after its first mention, up to the next real
+    heading, and is used only when none of the looked-up keywords is a
+    heading. Lookups are then plain dictionary reads.
+    """
+
+    def __init__(self, text):
+        self.text = text or ""
+        occurrences = []
+        for match in HEADING_REGEX.finditer(self.text):
+            keyword = match.group('heading').lower()
+            content_start = match.end()
+            is_heading = self._is_heading(match.start(), content_start)
+            occurrences.append((keyword, match.start(), content_start, is_heading))
+
+        boundaries = [start for _, start, _, is_heading in occurrences if is_heading]
+
+        self.sections = {}
+        self.mentions = {}
+        for keyword, start, content_start, is_heading in occurrences:
+            target = self.sections if is_heading else self.mentions
+            keys = [keyword] + _HEADING_PREFIXES[keyword] if is_heading else [keyword]
+            if all(key in target for key in keys):
+                continue
+            end_index = bisect.bisect_right(boundaries, start)
+            end = boundaries[end_index] if end_index < len(boundaries) else len(self.text)
+            content = self.text[content_start:end].lstrip(' \t:.-')
+            for key in keys:
+                target.setdefault(key, content)
+
+    def _is_heading(self, start, end):
+        line_start = self.text.rfind('\n', 0, start) + 1
+        if not self.text[line_start:start].strip(_LINE_PREFIX_CHARS):
+            return True
+        return self.text[end:end + 3].lstrip(' \t').startswith(':')
+
+    def get(self, keywords, max_length=200):
+        """Return the section under the first keyword present, trimmed to max_length.
+
+        Headings win over inline mentions whatever their order in keywords.
+        Raises ValueError for keywords that are not in SECTION_HEADINGS,
+        since those would never be found.
+        """
+        unknown = [keyword for keyword in keywords if keyword not in _HEADING_PREFIXES]
+        if unknown:
+            raise ValueError(f"Not a section heading: {unknown[0]!r}; add it to SECTION_HEADINGS")
+
+        for found in (self.sections, self.mentions):
+            for keyword in keywords:
+                content = found.get(keyword)
+                if content is None:
+                    continue
+                content = content.strip()
+                # Limit length
+                if len(content) > max_length:
+                    content = content[:max_length] + "..."
+                return content
+        return ""
@@ -0,0 +1,43 @@
+from io import BytesIO
+
+from flask import Request
+from werkzeug.formparser import default_stream_factory
+
+from config import UPLOAD_MEMORY_MAX_BYTES
+
+
+def memory_stream_factory(total_content_length, content_type, filename, content_length=None):
+    """Buffer multipart file parts in memory for requests up to UPLOAD_MEMORY_MAX_BYTES.
+
+    Werkzeug (and Quart) write every file part over 500 KB to a temporary
+    file while parsing, which would put phone photos and most PDFs back on
+    the disk before they reach the in-memory extraction path. Larger
+    requests, and ones without a Content-Length, keep the default.
+    """
+    if total_content_length is not None and total_content_length <= UPLOAD_MEMORY_MAX_BYTES:
+        return BytesIO()
+    return default_stream_factory(total_content_length, content_type, filename, content_length)
+
+
+class MemoryUploadRequest(Request):
+    """Flask request class that parses uploads with memory_stream_factory"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return memory_stream_factory(total_content_length, content_type, filename, content_length)
+
+
+def async_request_class():
+    """Return a Quart request class that parses uploads with memory_stream_factory"""
+    from quart.wrappers import Request as AsyncRequest
+
+    class MemoryUploadAsyncRequest(AsyncRequest):
+        def make_form_data_parser(self):
+            return self.form_data_parser_class(
+                max_content_length=self.max_content_length,
+                max_form_memory_size=self.max_form_memory_size,
+                max_form_parts=self.max_form_parts,
+                cls=self.parameter_storage_class,
+                stream_factory=memory_stream_factory
+            )
+
+    return MemoryUploadAsyncRequest
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class UploadSpool:
+    """Directory of uploaded files waiting to be processed.
+
+    Every file gets a random name, so concurrent uploads of the same client
+    filename never overwrite each other, and is deleted once processed.
+    Files left behind (a crashed worker, a lost job) are removed after
+    ttl_seconds, and when the directory grows past max_bytes the oldest
+    files go first. A background thread in each process sweeps the
+    directory every sweep_interval seconds.
+
+    Files that have not been released yet (a large PDF being rasterised, the
+    source of a queued job) are never removed: the process that saved one
+    keeps it open with a shared lock, which the sweepers of every process
+    check for, so the spool can go over max_bytes while they are in use.
+    """
+
+    def __init__(self, directory, ttl_seconds=3600, max_bytes=1024 * 1024 * 1024, sweep_interval=300):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._sweeper = None
+        self._lock = threading.Lock()
+        # Path -> open file holding the in-use lock, until released
+        self._held = {}
+
+    def save(self, file_data, ext):
+        """Write an upload to the spool and return its path"""
+        os.makedirs(self.directory, exist_ok=True)
+        self._start_sweeper()
+        path = os.path.join(self.directory, uuid.uuid4().hex + ext)
+        f = open(path, 'wb')
+        try:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH)
+            f.write(file_data)
+            f.flush()
+        except BaseException:
+            f.close()
+            self._remove(path)
+            raise
+        with self._lock:
+            self._held[path] = f
+        if self.max_bytes:
+            self._enforce_quota(keep=path)
+        return path
+
+    def release(self, path):
+        """Delete a spooled file once it has been processed"""
+        with self._lock:
+            held = self._held.pop(path, None)
+        try:
+            self._remove(path)
+        finally:
+            if held is not None:
+                held.close()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            traceback.print_exc()
+
+    def _remove_unused(self, path):
+        """Delete a file left in the spool unless it is still in use; returns whether it is gone"""
+        with self._lock:
+            if path in self._held:
+                return False
+        if fcntl is None:
+            self._remove(path)
+            return True
+        try:
+            with open(path, 'rb') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # Saved by another process that has not released it
+                    return False
+                self._remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    @contextmanager
+    def spooled(self, file_data, ext):
+        """Spool an upload for the duration of a with block"""
+        path = self.save(file_data, ext)
+        try:
+            yield path
+        finally:
+            self.release(path)
+
+    def _entries(self):
+        """Return (modified time, size, path) of every spooled file, oldest first"""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    try:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    except FileNotFoundError:
+                        # Released by another worker while scanning
+                        continue
+        except FileNotFoundError:
+            return []
+        entries.sort()
+        return entries
+
+    def _enforce_quota(self, keep=None):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep or not self._remove_unused(path):
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def sweep(self):
+        """Delete expired files, then the oldest ones while over quota; returns how many"""
+        removed = 0
+        if self.ttl_seconds:
+            cutoff = time.time() - self.ttl_seconds
+            for modified, _, path in self._entries():
+                if modified >= cutoff:
+                    break
+                if self._remove_unused(path):
+                    removed += 1
+        if self.max_bytes:
+            removed += self._enforce_quota()
+        return removed
+
+    def stats(self):
+        """Return the size of the spool, and how many of its files this process holds"""
+        entries = self._entries()
+        with self._lock:
+            in_use = len(self._held)
+        return {
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "in_use": in_use,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _start_sweeper(self):
+        # Started on first use so that each gunicorn worker runs its own after forking
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            if not self.sweep_interval:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_forever, name='upload-spool-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception:
+                traceback.print_exc()